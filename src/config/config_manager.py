@@ -1,204 +1,484 @@
-"""配置管理模块.
-
-统一管理项目配置，支持从JSON文件加载配置。
-支持代理配置和其他高级选项。
-"""
-
-import json
-from pathlib import Path
-from typing import Any
-
-
-class ConfigManager:
-    """配置管理器类.
-
-    负责加载、验证和管理项目配置。支持代理配置和其他高级选项。
-    """
-
-    def __init__(self, config_file: str = ".espanso-llm-quick-translate.json") -> None:
-        """初始化配置管理器.
-
-        Args:
-            config_file: 配置文件路径，支持相对路径和绝对路径
-        """
-        # 处理相对路径，相对于项目根目录
-        if not Path(config_file).is_absolute():
-            # 获取项目根目录（src的父目录）
-            project_root = Path(__file__).parent.parent.parent
-            self.config_file = project_root / config_file
-        else:
-            self.config_file = Path(config_file)
-
-        self._config: dict[str, Any] = {}
-        self._load_config()
-
-    def _load_config(self) -> None:
-        """加载配置文件."""
-        if not self.config_file.exists():
-            msg = f"配置文件不存在: {self.config_file}"
-            raise FileNotFoundError(msg)
-
-        try:
-            with Path.open(self.config_file, encoding="utf-8") as f:
-                self._config = json.load(f)
-        except json.JSONDecodeError as e:
-            msg = f"配置文件格式错误: {e}"
-            raise ValueError(msg) from e
-
-    def get(self, key: str, default: str | None = None) -> str:
-        """获取配置值.
-
-        Args:
-            key: 配置键
-            default: 默认值
-
-        Returns
-        -------
-            配置值
-        """
-        return self._config.get(key, default)
-
-    def get_required(self, key: str) -> str:
-        """获取必需的配置值.
-
-        Args:
-            key: 配置键
-
-        Returns
-        -------
-            配置值
-
-        Raises
-        ------
-            ValueError: 如果配置值不存在
-        """
-        value = self._config.get(key)
-        if value is None:
-            msg = f"必需的配置项缺失: {key}"
-            raise ValueError(msg)
-        return str(value)
-
-    @property
-    def api_key(self) -> str:
-        """获取API密钥."""
-        return self.get_required("api_key")
-
-    @property
-    def base_url(self) -> str:
-        """获取基础URL."""
-        return self.get_required("base_url")
-
-    @property
-    def model(self) -> str:
-        """获取模型名称."""
-        return self.get_required("model")
-
-    @property
-    def proxy(self) -> str | None:
-        """获取代理URL."""
-        return self.get("proxy")
-
-    @property
-    def auto_play(self) -> bool:
-        """获取是否自动播放."""
-        return self.get("auto_play", "false").lower() == "true"
-
-    @property
-    def diff_output_path(self) -> str:
-        """获取diff输出文件路径."""
-        path = self.get("diff_output_path", "diffs_text.txt")
-        # 处理相对路径
-        if not Path(path).is_absolute():
-            project_root = Path(__file__).parent.parent.parent
-            return str(project_root / path)
-        return path
-
-    @property
-    def audio_file_path(self) -> str:
-        """获取音频文件路径."""
-        path = self.get("audio_file_path", "translated.mp3")
-        # 处理相对路径
-        if not Path(path).is_absolute():
-            project_root = Path(__file__).parent.parent.parent
-            return str(project_root / path)
-        return path
-
-    @property
-    def system_prompt_file(self) -> str:
-        """获取系统提示文件路径."""
-        path = self.get("system_prompt_file", "src/resources/system_prompt.txt")
-        # 处理相对路径
-        if not Path(path).is_absolute():
-            project_root = Path(__file__).parent.parent.parent
-            return str(project_root / path)
-        return path
-
-    @property
-    def showdiffs_skin_path(self) -> str:
-        """获取showdiffs皮肤文件路径."""
-        path = self.get(
-            "showdiffs_skin_path",
-        )
-        # 处理相对路径
-        if not Path(path).is_absolute():
-            project_root = Path(__file__).parent.parent.parent
-            return str(project_root / path)
-        return path
-
-    @property
-    def sound_name(self) -> str:
-        """获取语音名称."""
-        return self.get("sound_name", "en-GB-LibbyNeural")
-
-    @property
-    def target_language(self) -> str:
-        """获取目标语言."""
-        return self.get("target_language", "English")
-
-    @property
-    def timeout(self) -> int:
-        """获取超时时间（秒）."""
-        return int(self.get("timeout", "30"))
-
-    @property
-    def max_retries(self) -> int:
-        """获取最大重试次数."""
-        return int(self.get("max_retries", "3"))
-
-    @property
-    def log_level(self) -> str:
-        """获取日志级别."""
-        return self.get("log_level", "INFO")
-
-    def validate(self) -> None:
-        """验证配置完整性."""
-        required_keys = ["api_key", "base_url", "model"]
-        missing_keys = [key for key in required_keys if not self._config.get(key)]
-
-        if missing_keys:
-            msg = f"配置文件中缺少必需的配置项: {', '.join(missing_keys)}"
-            raise ValueError(msg)
-
-    def get_all_config(self) -> dict[str, Any]:
-        """获取所有配置（用于调试）.
-
-        Returns
-        -------
-            所有配置的字典
-        """
-        return {
-            "api_key": self.api_key,
-            "base_url": self.base_url,
-            "model": self.model,
-            "proxy": self.proxy,
-            "auto_play": self.auto_play,
-            "diff_output_path": self.diff_output_path,
-            "audio_file_path": self.audio_file_path,
-            "system_prompt_file": self.system_prompt_file,
-            "showdiffs_skin_path": self.showdiffs_skin_path,
-            "sound_name": self.sound_name,
-            "target_language": self.target_language,
-            "timeout": self.timeout,
-            "max_retries": self.max_retries,
-            "log_level": self.log_level,
-        }
+"""配置管理模块.
+
+统一管理项目配置，支持从JSON文件加载配置。
+支持代理配置和其他高级选项。
+"""
+
+import functools
+import hashlib
+import json
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    # C实现的JSON解析器，未安装时回退到标准库
+    import orjson
+except ImportError:
+    orjson = None
+
+# 磁盘缓存中不落盘的敏感配置项，访问时回源配置文件读取
+_SECRET_CONFIG_KEYS = frozenset({"api_key"})
+
+# 进程内配置解析缓存:
+# 配置文件路径 -> (mtime_ns, 解析结果, 是否含敏感项, 存在的敏感项名)
+_CONFIG_CACHE: dict[str, tuple[int, dict[str, Any], bool, frozenset[str]]] = {}
+
+
+def _user_cache_dir() -> Path:
+    """获取用户私有的缓存目录.
+
+    遵循XDG规范，未设置时退回~/.cache；目录以0700权限创建，
+    其他用户不可读取。
+
+    Returns
+    -------
+        本项目的用户缓存目录路径
+    """
+    base = os.environ.get("XDG_CACHE_HOME")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "espanso-llm-quick-translate"
+
+
+def _as_bool(value: Any) -> bool:
+    """把配置值转换为布尔值，JSON原生布尔直接返回，字符串按"true"判断."""
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() == "true"
+
+
+@dataclass(frozen=True, slots=True)
+class ResolvedConfig:
+    """加载时解析完成的类型化配置.
+
+    布尔和整数转换在加载时只做一次，之后的读取是C级别的slot访问，
+    不再有字典查找和字符串比较。
+    """
+
+    proxy: str | None
+    auto_play: bool
+    sound_name: str
+    target_language: str
+    timeout: int
+    max_retries: int
+    log_level: str
+    cache_enabled: bool
+    use_daemon: bool
+    daemon_port: int
+    daemon_idle_timeout: int
+    worker_port: int
+
+
+class ConfigManager:
+    """配置管理器类.
+
+    负责加载、验证和管理项目配置。支持代理配置和其他高级选项。
+    """
+
+    def __init__(self, config_file: str = ".espanso-llm-quick-translate.json") -> None:
+        """初始化配置管理器.
+
+        Args:
+            config_file: 配置文件路径，支持相对路径和绝对路径
+        """
+        # 项目根目录（src的父目录）只计算一次，供各路径属性复用
+        self._project_root = Path(__file__).resolve().parents[2]
+        # 带分隔符的字符串形式，路径属性用纯字符串拼接，不再构造Path对象
+        self._project_root_str = str(self._project_root) + os.sep
+
+        # 处理相对路径，相对于项目根目录
+        if not os.path.isabs(config_file):
+            self.config_file = self._project_root / config_file
+        else:
+            self.config_file = Path(config_file)
+
+        self._config: dict[str, Any] = {}
+        # 磁盘快照不含敏感项，命中时标记为未加载，首次访问敏感项再回源
+        self._secrets_loaded = False
+        # 配置文件中实际存在的敏感项名（不含值），validate()凭此
+        # 在快照命中时也能校验完整性而不回源解析
+        self._secret_keys_present: frozenset[str] = frozenset()
+        self._load_config()
+        self.resolved = self._resolve_config()
+
+    def _load_config(self) -> None:
+        """加载配置文件.
+
+        解析结果按文件mtime缓存在进程内，文件未变化时直接复用，
+        避免重复的磁盘读取和JSON解析。
+        """
+        # 单次stat同时完成存在性检查和mtime获取，省去一次系统调用
+        try:
+            stat = self.config_file.stat()
+        except FileNotFoundError as e:
+            msg = f"配置文件不存在: {self.config_file}"
+            raise FileNotFoundError(msg) from e
+        cache_key = str(self.config_file)
+        cached = _CONFIG_CACHE.get(cache_key)
+        if cached is not None and cached[0] == stat.st_mtime_ns:
+            self._config = cached[1]
+            self._secrets_loaded = cached[2]
+            self._secret_keys_present = cached[3]
+            return
+
+        # 跨进程缓存：espanso每次触发都是新进程，进程内缓存帮不上忙，
+        # 用户私有目录下的JSON快照按mtime校验后可以直接复用。
+        # 快照只含非敏感项，api_key等在首次访问时回源配置文件
+        disk_cache = self._disk_cache_path()
+        try:
+            raw = disk_cache.read_bytes()
+            snapshot = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            if snapshot["mtime_ns"] == stat.st_mtime_ns:
+                self._config = snapshot["values"]
+                self._secrets_loaded = False
+                self._secret_keys_present = frozenset(snapshot.get("secrets", []))
+                _CONFIG_CACHE[cache_key] = (
+                    stat.st_mtime_ns,
+                    self._config,
+                    False,
+                    self._secret_keys_present,
+                )
+                return
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        self._parse_config_file(stat.st_mtime_ns)
+
+        # 写入非敏感项快照：0600权限的临时文件原子替换，
+        # 其他用户既读不到内容也无法用预置文件投毒。
+        # 敏感项只记录名字，供validate()在快照命中时校验存在性
+        try:
+            values = {k: v for k, v in self._config.items() if k not in _SECRET_CONFIG_KEYS}
+            snapshot = {
+                "mtime_ns": stat.st_mtime_ns,
+                "values": values,
+                "secrets": sorted(self._secret_keys_present),
+            }
+            payload = orjson.dumps(snapshot) if orjson is not None else json.dumps(snapshot).encode("utf-8")
+            disk_cache.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_path = f"{disk_cache}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.write(fd, payload)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, disk_cache)
+        except OSError:
+            # 缓存写入失败不影响正常流程
+            pass
+
+    def _parse_config_file(self, mtime_ns: int) -> None:
+        """解析配置文件本体（含敏感项）并更新进程内缓存.
+
+        Args:
+            mtime_ns: 配置文件当前的mtime，用作缓存校验键
+
+        Raises
+        ------
+            ValueError: 配置文件格式错误
+        """
+        try:
+            if orjson is not None:
+                self._config = orjson.loads(self.config_file.read_bytes())
+            else:
+                with Path.open(self.config_file, encoding="utf-8") as f:
+                    self._config = json.load(f)
+        except ValueError as e:
+            # orjson.JSONDecodeError和json.JSONDecodeError都是ValueError的子类
+            msg = f"配置文件格式错误: {e}"
+            raise ValueError(msg) from e
+
+        self._secrets_loaded = True
+        self._secret_keys_present = frozenset(
+            k for k in _SECRET_CONFIG_KEYS if self._config.get(k)
+        )
+        _CONFIG_CACHE[str(self.config_file)] = (
+            mtime_ns,
+            self._config,
+            True,
+            self._secret_keys_present,
+        )
+
+    def _ensure_secrets(self) -> None:
+        """确保敏感配置项已加载.
+
+        磁盘快照命中时_config不含api_key等敏感项，
+        首次访问敏感项的进程在此回源解析配置文件本体。
+        """
+        if self._secrets_loaded:
+            return
+        self._parse_config_file(self.config_file.stat().st_mtime_ns)
+
+    def _disk_cache_path(self) -> Path:
+        """获取跨进程配置缓存文件路径.
+
+        Returns
+        -------
+            用户缓存目录下按配置文件路径哈希命名的快照路径
+        """
+        digest = hashlib.blake2b(str(self.config_file).encode(), digest_size=6).hexdigest()
+        return _user_cache_dir() / f"cfg-{digest}.json"
+
+    def _resolve_config(self) -> ResolvedConfig:
+        """将原始配置解析为类型化配置（加载时执行一次）.
+
+        Returns
+        -------
+            类型化配置
+        """
+        get = self._config.get
+        return ResolvedConfig(
+            proxy=get("proxy"),
+            auto_play=_as_bool(get("auto_play", False)),
+            sound_name=get("sound_name", "en-GB-LibbyNeural"),
+            target_language=get("target_language", "English"),
+            timeout=int(get("timeout", "30")),
+            max_retries=int(get("max_retries", "3")),
+            log_level=get("log_level", "INFO"),
+            cache_enabled=_as_bool(get("cache_enabled", True)),
+            use_daemon=_as_bool(get("use_daemon", False)),
+            daemon_port=int(get("daemon_port", "48100")),
+            daemon_idle_timeout=int(get("daemon_idle_timeout", "300")),
+            worker_port=int(get("worker_port", "48101")),
+        )
+
+    def get(self, key: str, default: str | None = None) -> str:
+        """获取配置值.
+
+        Args:
+            key: 配置键
+            default: 默认值
+
+        Returns
+        -------
+            配置值
+        """
+        return self._config.get(key, default)
+
+    def get_required(self, key: str) -> str:
+        """获取必需的配置值.
+
+        Args:
+            key: 配置键
+
+        Returns
+        -------
+            配置值
+
+        Raises
+        ------
+            ValueError: 如果配置值不存在
+        """
+        value = self._config.get(key)
+        if value is None and not self._secrets_loaded:
+            # 快照路径不含敏感项，回源配置文件后重试
+            self._ensure_secrets()
+            value = self._config.get(key)
+        if value is None:
+            msg = f"必需的配置项缺失: {key}"
+            raise ValueError(msg)
+        return str(value)
+
+    @property
+    def api_key(self) -> str:
+        """获取API密钥."""
+        return self.get_required("api_key")
+
+    @property
+    def base_url(self) -> str:
+        """获取基础URL."""
+        return self.get_required("base_url")
+
+    @property
+    def model(self) -> str:
+        """获取模型名称."""
+        return self.get_required("model")
+
+    @property
+    def proxy(self) -> str | None:
+        """获取代理URL."""
+        return self.resolved.proxy
+
+    @property
+    def auto_play(self) -> bool:
+        """获取是否自动播放."""
+        return self.resolved.auto_play
+
+    @functools.cached_property
+    def diff_output_path(self) -> str:
+        """获取diff输出文件路径（首次访问后缓存）."""
+        path = self.get("diff_output_path", "diffs_text.txt")
+        # 纯字符串判断和拼接，全程不构造Path对象
+        if not os.path.isabs(path):
+            return self._project_root_str + path
+        return path
+
+    @functools.cached_property
+    def audio_file_path(self) -> str:
+        """获取音频文件路径（首次访问后缓存）."""
+        path = self.get("audio_file_path", "translated.mp3")
+        # 纯字符串判断和拼接，全程不构造Path对象
+        if not os.path.isabs(path):
+            return self._project_root_str + path
+        return path
+
+    @functools.cached_property
+    def system_prompt_file(self) -> str:
+        """获取系统提示文件路径（首次访问后缓存）."""
+        path = self.get("system_prompt_file", "src/resources/system_prompt.txt")
+        # 纯字符串判断和拼接，全程不构造Path对象
+        if not os.path.isabs(path):
+            return self._project_root_str + path
+        return path
+
+    @functools.cached_property
+    def showdiffs_skin_path(self) -> str:
+        """获取showdiffs皮肤文件路径（首次访问后缓存）."""
+        path = self.get(
+            "showdiffs_skin_path",
+        )
+        # 纯字符串判断和拼接，全程不构造Path对象
+        if not os.path.isabs(path):
+            return self._project_root_str + path
+        return path
+
+    @functools.cached_property
+    def system_prompt(self) -> str:
+        """获取系统提示内容（首次访问后缓存）.
+
+        通过mmap读取，多进程（守护进程和后台子进程）可共享同一份页缓存。
+
+        Returns
+        -------
+            系统提示内容
+
+        Raises
+        ------
+            FileNotFoundError: 系统提示文件不存在
+        """
+        prompt_file = Path(self.system_prompt_file)
+        # 直接打开并捕获异常（EAFP），省去exists()的额外stat系统调用
+        try:
+            f = Path.open(prompt_file, "rb")
+        except FileNotFoundError as e:
+            msg = f"系统提示文件不存在: {prompt_file}"
+            raise FileNotFoundError(msg) from e
+
+        with f:
+            # 空文件无法mmap，用已打开的fd做fstat判断
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return mm[:].decode("utf-8")
+            finally:
+                mm.close()
+
+    @property
+    def sound_name(self) -> str:
+        """获取语音名称."""
+        return self.resolved.sound_name
+
+    @property
+    def target_language(self) -> str:
+        """获取目标语言."""
+        return self.resolved.target_language
+
+    @property
+    def timeout(self) -> int:
+        """获取超时时间（秒）."""
+        return self.resolved.timeout
+
+    @property
+    def max_retries(self) -> int:
+        """获取最大重试次数."""
+        return self.resolved.max_retries
+
+    @property
+    def log_level(self) -> str:
+        """获取日志级别."""
+        return self.resolved.log_level
+
+    @property
+    def cache_enabled(self) -> bool:
+        """获取是否启用翻译缓存."""
+        return self.resolved.cache_enabled
+
+    @property
+    def cache_path(self) -> str:
+        """获取翻译缓存数据库路径."""
+        path = self.get("cache_path", "translation_cache.db")
+        # 纯字符串判断和拼接，全程不构造Path对象
+        if not os.path.isabs(path):
+            return self._project_root_str + path
+        return path
+
+    @property
+    def use_daemon(self) -> bool:
+        """获取是否使用常驻翻译守护进程."""
+        return self.resolved.use_daemon
+
+    @property
+    def daemon_port(self) -> int:
+        """获取守护进程监听端口（仅监听127.0.0.1）."""
+        return self.resolved.daemon_port
+
+    @property
+    def daemon_idle_timeout(self) -> int:
+        """获取守护进程空闲退出时间（秒）."""
+        return self.resolved.daemon_idle_timeout
+
+    @property
+    def worker_port(self) -> int:
+        """获取后台任务工作进程监听端口（仅监听127.0.0.1）."""
+        return self.resolved.worker_port
+
+    def validate(self) -> None:
+        """验证配置完整性.
+
+        快照命中时敏感项的值不在_config里，用快照记录的存在性
+        名单校验，不回源解析配置文件；敏感项的值等真正用到时
+        再由get_required按需加载。
+        """
+        required_keys = ["api_key", "base_url", "model"]
+        missing_keys = [
+            key
+            for key in required_keys
+            if not self._config.get(key) and key not in self._secret_keys_present
+        ]
+
+        if missing_keys:
+            msg = f"配置文件中缺少必需的配置项: {', '.join(missing_keys)}"
+            raise ValueError(msg)
+
+    def get_all_config(self) -> dict[str, Any]:
+        """获取所有配置（用于调试）.
+
+        Returns
+        -------
+            所有配置的字典
+        """
+        return {
+            "api_key": self.api_key,
+            "base_url": self.base_url,
+            "model": self.model,
+            "proxy": self.proxy,
+            "auto_play": self.auto_play,
+            "diff_output_path": self.diff_output_path,
+            "audio_file_path": self.audio_file_path,
+            "system_prompt_file": self.system_prompt_file,
+            "showdiffs_skin_path": self.showdiffs_skin_path,
+            "sound_name": self.sound_name,
+            "target_language": self.target_language,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries,
+            "log_level": self.log_level,
+            "cache_enabled": self.cache_enabled,
+            "cache_path": self.cache_path,
+            "use_daemon": self.use_daemon,
+            "daemon_port": self.daemon_port,
+            "daemon_idle_timeout": self.daemon_idle_timeout,
+            "worker_port": self.worker_port,
+        }
@@ -3,6 +3,7 @@
 管理服务实例的创建和生命周期。
 """
 
+import threading
 from typing import Optional
 
 from src.config import ConfigManager
@@ -12,26 +13,25 @@ from src.core.translation_manager import TranslationManager
 class ServiceFactory:
     """服务工厂类.
 
-    管理服务实例的创建和生命周期。
+    管理服务实例的创建和生命周期。线程安全：并发路径（异步翻译、
+    守护进程的并发请求）下采用双重检查锁，已初始化后的快路径无锁。
     """
 
     _instance: Optional["ServiceFactory"] = None
+    _instance_lock = threading.Lock()
+    _service_lock = threading.Lock()
     _config: ConfigManager | None = None
     _translation_manager: TranslationManager | None = None
 
     def __new__(cls) -> "ServiceFactory":
-        """单例模式实现."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-
-    def __init__(self) -> None:
-        """初始化服务工厂."""
-        # 单例模式，避免重复初始化
-        if hasattr(self, "_initialized"):
-            return
-
-        self._initialized = True
+        """单例模式实现（双重检查锁）."""
+        instance = cls._instance
+        if instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                instance = cls._instance
+        return instance
 
     def get_config(self, config_file: str = ".espanso-llm-quick-translate.json") -> ConfigManager:
         """获取配置管理器实例.
@@ -44,8 +44,11 @@ class ServiceFactory:
             配置管理器实例
         """
         if self._config is None:
-            self._config = ConfigManager(config_file)
-            self._config.validate()
+            with self._service_lock:
+                if type(self)._config is None:
+                    config = ConfigManager(config_file)
+                    config.validate()
+                    type(self)._config = config
 
         return self._config
 
@@ -63,11 +66,14 @@ class ServiceFactory:
             config = self.get_config()
 
         if self._translation_manager is None:
-            self._translation_manager = TranslationManager(config)
+            with self._service_lock:
+                if type(self)._translation_manager is None:
+                    type(self)._translation_manager = TranslationManager(config)
 
         return self._translation_manager
 
     def reset(self) -> None:
         """重置所有服务实例."""
-        self._config = None
-        self._translation_manager = None
+        with self._service_lock:
+            type(self)._config = None
+            type(self)._translation_manager = None
@@ -1,91 +1,259 @@
-"""翻译管理器模块.
-
-协调各个服务，管理翻译流程。立即返回翻译结果，其余工作异步执行。
-"""
-
-import concurrent.futures
-import subprocess
-import sys
-import time
-from pathlib import Path
-
-from src.config import ConfigManager
-from src.services import AudioService, DiffService, LLMService
-from src.utils import get_logger
-
-
-class TranslationManager:
-    """翻译管理器类.
-
-    协调各个服务，管理翻译流程。优化为立即返回翻译结果，其余工作异步执行。
-    """
-
-    def __init__(self, config: ConfigManager) -> None:
-        """初始化翻译管理器.
-
-        Args:
-            config: 配置管理器
-        """
-        self.config = config
-        self.llm_service = LLMService(config)
-        self.audio_service = AudioService(config)
-        self.diff_service = DiffService(config)
-        self.logger = get_logger("TranslationManager")
-        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
-        self._background_tasks: list[concurrent.futures.Future] = []
-
-    def translate_text(self, text: str) -> str:
-        """翻译文本并立即返回结果，并异步生成音频和diff."""
-        start_time = time.time()
-        self.logger.info(f"开始翻译文本: {text[:50]}{'...' if len(text) > 50 else ''}")
-        try:
-            # 立即调用LLM API翻译
-            translated = self.llm_service.translate(text)
-            translation_time = time.time() - start_time
-            self.logger.info(f"翻译完成，耗时: {translation_time:.2f}秒")
-            self.logger.info(f"翻译结果: {translated[:50]}{'...' if len(translated) > 50 else ''}")
-            # 启动音频生成子进程
-            self._start_audio_process(translated)
-            # 启动diff生成子进程
-            self._start_diff_process(text, translated)
-        except Exception as e:
-            self.logger.error(f"翻译失败: {e}", exc_info=True)
-            return f"❌ 翻译失败: {e}"
-        else:
-            return translated
-
-    def _start_audio_process(self, translated_text: str) -> None:
-        """启动音频生成子进程."""
-        script_path = Path(__file__).parent.parent / "subprocesses/generate_audio.py"
-        subprocess.Popen(
-            [sys.executable, script_path, translated_text],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            stdin=subprocess.DEVNULL,
-            start_new_session=True,  # 创建新的会话组
-        )
-
-    def _start_diff_process(self, original_text: str, translated_text: str) -> None:
-        """启动diff生成子进程."""
-        script_path = Path(__file__).parent.parent / "subprocesses/generate_diff.py"
-        subprocess.Popen(
-            [sys.executable, script_path, original_text, translated_text],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            stdin=subprocess.DEVNULL,
-            start_new_session=True,  # 创建新的会话组
-        )
-
-    def play_last_audio(self) -> None:
-        """手动播放音频."""
-        try:
-            self.logger.info("手动播放音频")
-            self.audio_service.play_last_audio()
-            self.logger.info("音频播放完成")
-        except Exception as e:
-            self.logger.error(f"音频播放失败: {e}", exc_info=True)
-
-    @property
-    def last_audio_file(self) -> str | None:
-        """获取最后一个音频文件路径."""
-        return self.audio_service.last_audio_file
+"""翻译管理器模块.
+
+协调各个服务，管理翻译流程。立即返回翻译结果，其余工作异步执行。
+"""
+
+import asyncio
+import concurrent.futures
+import sys
+import time
+from pathlib import Path
+
+from src.config import ConfigManager
+from src.services import AudioService, CacheService, DiffService, LLMService
+from src.utils import get_logger, get_worker_authkey, spawn_detached
+
+
+class TranslationManager:
+    """翻译管理器类.
+
+    协调各个服务，管理翻译流程。优化为立即返回翻译结果，其余工作异步执行。
+    """
+
+    def __init__(self, config: ConfigManager) -> None:
+        """初始化翻译管理器.
+
+        Args:
+            config: 配置管理器
+        """
+        self.config = config
+        self.llm_service = LLMService(config)
+        self.audio_service = AudioService(config)
+        self.diff_service = DiffService(config)
+        self.cache_service = CacheService(config)
+        self.logger = get_logger("TranslationManager")
+        self._background_tasks: list[concurrent.futures.Future] = []
+        self._audio_stream_task: asyncio.Task | None = None
+        self._deferred_background: tuple[str, str] | None = None
+
+    def translate_text(self, text: str, *, defer_background: bool = False) -> str:
+        """翻译文本并立即返回结果，并异步生成音频和diff.
+
+        Args:
+            text: 要翻译的文本
+            defer_background: 为True时暂不调度音频/diff后台任务，
+                由调用方在输出译文后调用start_deferred_background()，
+                使espanso拿到结果的时刻提前到任何后台调度之前
+
+        Returns
+        -------
+            翻译结果
+        """
+        start_time = time.time()
+        # %风格延迟格式化：日志级别不足时完全不构造消息字符串
+        self.logger.info("开始翻译文本: %.50s%s", text, "..." if len(text) > 50 else "")
+        try:
+            # 优先查询本地缓存，命中时跳过LLM网络往返
+            cache_key = None
+            if self.config.cache_enabled:
+                cache_key = CacheService.make_key(
+                    self.config.model,
+                    self.config.target_language,
+                    self.config.system_prompt,
+                    text,
+                )
+                cached = self.cache_service.get(cache_key)
+                if cached is not None:
+                    self.logger.info("翻译缓存命中，跳过LLM调用")
+                    # 缓存命中也重新生成音频和diff，保证两者与本次译文一致
+                    self._dispatch_background(text, cached, defer=defer_background)
+                    return cached
+
+            # 流式调用LLM API翻译，边到达边累积
+            parts: list[str] = []
+            parts.extend(self.llm_service.translate_stream(text))
+            translated = "".join(parts).strip()
+            if cache_key is not None:
+                self.cache_service.put(cache_key, text, translated)
+            translation_time = time.time() - start_time
+            self.logger.info("翻译完成，耗时: %.2f秒", translation_time)
+            self.logger.info("翻译结果: %.50s%s", translated, "..." if len(translated) > 50 else "")
+            # 调度音频和diff生成
+            self._dispatch_background(text, translated, defer=defer_background)
+        except Exception as e:
+            self.logger.error(f"翻译失败: {e}", exc_info=True)
+            return f"❌ 翻译失败: {e}"
+        else:
+            return translated
+
+    def _dispatch_background(self, text: str, translated: str, *, defer: bool) -> None:
+        """调度或暂存音频/diff后台任务.
+
+        Args:
+            text: 原文
+            translated: 译文
+            defer: 为True时只暂存，等待start_deferred_background()
+        """
+        if defer:
+            self._deferred_background = (text, translated)
+            return
+        self._start_audio_process(translated)
+        self._start_diff_process(text, translated)
+
+    def start_deferred_background(self) -> None:
+        """执行之前被推迟的音频/diff后台调度.
+
+        供主进程在译文写入stdout之后调用，保证espanso的粘贴
+        不被后台任务的socket连接/进程拉起抢占。
+        """
+        if self._deferred_background is None:
+            return
+        text, translated = self._deferred_background
+        self._deferred_background = None
+        self._start_audio_process(translated)
+        self._start_diff_process(text, translated)
+
+    async def translate_text_async(self, text: str) -> str:
+        """异步翻译文本并立即返回结果，音频和diff调度并行执行.
+
+        Args:
+            text: 要翻译的文本
+
+        Returns
+        -------
+            翻译结果
+        """
+        start_time = time.time()
+        # %风格延迟格式化：日志级别不足时完全不构造消息字符串
+        self.logger.info("开始异步翻译文本: %.50s%s", text, "..." if len(text) > 50 else "")
+        try:
+            # 优先查询本地缓存，命中时跳过LLM网络往返
+            cache_key = None
+            translated = None
+            if self.config.cache_enabled:
+                cache_key = CacheService.make_key(
+                    self.config.model,
+                    self.config.target_language,
+                    self.config.system_prompt,
+                    text,
+                )
+                translated = self.cache_service.get(cache_key)
+                if translated is not None:
+                    self.logger.info("翻译缓存命中，跳过LLM调用")
+
+            if translated is None:
+                # 流式接收译文，完整句子即时送入TTS队列，使TTS与LLM解码并行
+                sentence_queue: asyncio.Queue = asyncio.Queue()
+                self._audio_stream_task = asyncio.ensure_future(
+                    self.audio_service.stream_tts_from_queue(sentence_queue),
+                )
+                parts: list[str] = []
+                buffer = ""
+                try:
+                    async for delta in self.llm_service.translate_stream_async(text):
+                        parts.append(delta)
+                        buffer += delta
+                        complete, buffer = AudioService.split_complete_sentences(buffer)
+                        for sentence in complete:
+                            sentence_queue.put_nowait(sentence)
+                    if buffer.strip():
+                        sentence_queue.put_nowait(buffer.strip())
+                finally:
+                    # 结束标记必须送达，否则音频任务会永远等待队列
+                    sentence_queue.put_nowait(None)
+
+                translated = "".join(parts).strip()
+                if cache_key is not None:
+                    self.cache_service.put(cache_key, text, translated)
+                translation_time = time.time() - start_time
+                self.logger.info("异步翻译完成，耗时: %.2f秒", translation_time)
+
+                # 音频任务在后台继续播放，不阻塞译文返回；diff单独调度
+                await asyncio.to_thread(self._start_diff_process, text, translated)
+            else:
+                # 缓存命中：没有流式增量，走原有的整段音频+diff调度；
+                # return_exceptions保证一方失败不取消另一方
+                results = await asyncio.gather(
+                    asyncio.to_thread(self._start_audio_process, translated),
+                    asyncio.to_thread(self._start_diff_process, text, translated),
+                    return_exceptions=True,
+                )
+                for name, result in zip(("音频", "diff"), results, strict=True):
+                    if isinstance(result, BaseException):
+                        self.logger.error(f"{name}后台调度失败: {result}")
+        except Exception as e:
+            self.logger.error(f"异步翻译失败: {e}", exc_info=True)
+            return f"❌ 翻译失败: {e}"
+        else:
+            return translated
+
+    def _send_to_worker(self, message: tuple) -> bool:
+        """尝试把后台任务投递给常驻工作进程.
+
+        Args:
+            message: 任务元组
+
+        Returns
+        -------
+            是否投递成功；失败时顺带拉起工作进程供后续请求使用
+        """
+        if not self.config.use_daemon:
+            return False
+
+        from multiprocessing.connection import Client
+
+        try:
+            with Client(
+                ("127.0.0.1", self.config.worker_port),
+                authkey=get_worker_authkey(),
+            ) as conn:
+                conn.send(message)
+        except OSError:
+            script_path = Path(__file__).parent.parent / "subprocesses/background_worker.py"
+            spawn_detached([sys.executable, str(script_path)])
+            self.logger.debug("后台工作进程不可用，已拉起新实例")
+            return False
+        else:
+            return True
+
+    def _start_audio_process(self, translated_text: str) -> None:
+        """启动音频生成子进程."""
+        if self._send_to_worker(("audio", translated_text)):
+            return
+        script_path = Path(__file__).parent.parent / "subprocesses/generate_audio.py"
+        spawn_detached([sys.executable, str(script_path), translated_text])
+
+    def _start_diff_process(self, original_text: str, translated_text: str) -> None:
+        """启动diff生成子进程."""
+        if self._send_to_worker(("diff", original_text, translated_text)):
+            return
+        script_path = Path(__file__).parent.parent / "subprocesses/generate_diff.py"
+        spawn_detached([sys.executable, str(script_path), original_text, translated_text])
+
+    def wait_for_background_tasks(self, timeout: float | None = None) -> None:
+        """等待已记录的后台任务完成.
+
+        音频和diff生成走完全分离的子进程/工作进程，不在等待范围内；
+        这里只等待提交到线程池的任务（如有），主要供测试使用。
+
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+        """
+        if not self._background_tasks:
+            return
+        concurrent.futures.wait(self._background_tasks, timeout=timeout)
+        self._background_tasks.clear()
+
+    def play_last_audio(self) -> None:
+        """手动播放音频."""
+        try:
+            self.logger.info("手动播放音频")
+            self.audio_service.play_last_audio()
+            self.logger.info("音频播放完成")
+        except Exception as e:
+            self.logger.error(f"音频播放失败: {e}", exc_info=True)
+
+    @property
+    def last_audio_file(self) -> str | None:
+        """获取最后一个音频文件路径."""
+        return self.audio_service.last_audio_file
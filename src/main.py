@@ -1,94 +1,173 @@
-"""主程序模块.
-
-espanso包的主入口点，处理翻译请求。支持详细的日志记录和错误处理。
-优化为立即返回翻译结果，后台任务异步执行。
-"""
-
-import io
-import sys
-import time
-from pathlib import Path
-
-from core import ServiceFactory
-from utils import setup_logging
-
-
-def main() -> None:
-    """主程序入口.
-
-    解析参数，验证输入，调用翻译管理器，并立即打印结果给espanso。
-    后台任务（音频生成、diff生成、自动播放）异步执行。
-    """
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
-    start_time = time.time()
-
-    # 设置日志记录
-    log_file = Path(__file__).parent.parent / "logs" / "translation.log"
-    logger = setup_logging(log_file=str(log_file))
-
-    logger.info("=" * 50)
-    logger.info("开始新的翻译请求")
-    logger.info(f"命令行参数: {sys.argv}")
-
-    if len(sys.argv) != 2:
-        error_msg = '用法错误: python main.py "<text>"'
-        logger.error(error_msg)
-        # 使用 sys.stdout.write()，性能略高于print
-        sys.stdout.write('❌ 用法错误: python main.py "<text>"')
-        sys.stdout.flush()
-        return
-
-    original = sys.argv[1]
-    if not original.strip():
-        error_msg = "未提供要翻译的文本"
-        logger.error(error_msg)
-        # 使用 sys.stdout.write()，性能略高于print
-        sys.stdout.write("❌ 错误: 未提供要翻译的文本!")
-        sys.stdout.flush()
-        return
-
-    logger.info(f"输入文本长度: {len(original)}字符")
-    logger.debug(f"输入文本: {original[:100]}{'...' if len(original) > 100 else ''}")
-
-    try:
-        # 使用服务工厂获取翻译管理器
-        factory = ServiceFactory()
-        translation_manager = factory.get_translation_manager()
-
-        # 翻译文本（立即返回结果）
-        translated = translation_manager.translate_text(original)
-
-        total_time = time.time() - start_time
-        logger.info(f"翻译请求完成，总耗时: {total_time:.2f}秒")
-        logger.info(f"翻译结果: {translated[:100]}{'...' if len(translated) > 100 else ''}")
-
-        # 立即输出翻译结果给espanso
-        sys.stdout.write(translated)
-        sys.stdout.flush()
-
-        # 后台任务已在翻译管理器中异步启动，无需等待
-
-    except FileNotFoundError as e:
-        error_msg = f"配置文件错误: {e}"
-        logger.error(error_msg, exc_info=True)
-        sys.stdout.write(f"❌ 配置文件错误: {e}")
-        sys.stdout.flush()
-    except ValueError as e:
-        error_msg = f"配置错误: {e}"
-        logger.error(error_msg, exc_info=True)
-        sys.stdout.write(f"❌ 配置错误: {e}")
-        sys.stdout.flush()
-    except Exception as e:
-        total_time = time.time() - start_time
-        error_msg = f"翻译失败: {e}"
-        logger.error(f"{error_msg}，总耗时: {total_time:.2f}秒", exc_info=True)
-        sys.stdout.write(f"❌ 翻译失败: {e}")
-        sys.stdout.flush()
-
-    finally:
-        logger.info("翻译请求结束")
-        logger.info("=" * 50)
-
-
-if __name__ == "__main__":
-    main()
+"""主程序模块.
+
+espanso包的主入口点，处理翻译请求。支持详细的日志记录和错误处理。
+优化为立即返回翻译结果，后台任务异步执行。
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+from config import ConfigManager
+from utils import get_worker_authkey, setup_logging, spawn_detached
+
+
+def _write_stdout(text: str) -> None:
+    """把文本以UTF-8字节直接写到stdout.
+
+    os.write单次系统调用完成输出，绕过TextIOWrapper的
+    编码缓冲和flush开销，espanso在进程退出时收到完整字节。
+
+    Args:
+        text: 要输出的文本
+    """
+    os.write(1, text.encode("utf-8"))
+
+
+def _translate_via_daemon(text: str, config: ConfigManager, logger) -> str | None:
+    """尝试通过常驻守护进程翻译.
+
+    守护进程保持OpenAI客户端和连接池热状态，命中时可省去
+    重量级依赖的导入耗时。连接失败返回None，回退到进程内翻译。
+
+    Args:
+        text: 要翻译的文本
+        config: 配置管理器
+        logger: 日志记录器
+
+    Returns
+    -------
+        翻译结果，守护进程不可用时为None
+    """
+    import hmac
+    import socket
+
+    try:
+        with socket.create_connection(("127.0.0.1", config.daemon_port), timeout=0.2) as conn:
+            # 认证质询：守护进程先发16字节随机数，
+            # 客户端回以HMAC-SHA256(认证密钥, 随机数)再发送正文
+            nonce = b""
+            while len(nonce) < 16:
+                part = conn.recv(16 - len(nonce))
+                if not part:
+                    raise ConnectionError("守护进程未发送认证质询")
+                nonce += part
+            digest = hmac.new(get_worker_authkey(), nonce, "sha256").digest()
+            conn.sendall(digest + text.encode("utf-8"))
+            conn.shutdown(socket.SHUT_WR)
+            conn.settimeout(config.timeout)
+            chunks = []
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+        reply = b"".join(chunks)
+        if not reply:
+            # 连接成功但零字节响应（认证失败、守护进程中途崩溃等），
+            # 不能当作"翻译结果是空串"，回退到进程内翻译
+            logger.debug("守护进程返回空响应，回退到进程内翻译")
+            return None
+        return reply.decode("utf-8")
+    except OSError as e:
+        logger.debug(f"守护进程不可用，回退到进程内翻译: {e}")
+        return None
+
+
+def _spawn_daemon(logger) -> None:
+    """后台启动守护进程，为后续请求预热."""
+    script_path = Path(__file__).parent / "subprocesses" / "translate_daemon.py"
+    try:
+        spawn_detached([sys.executable, str(script_path)])
+        logger.info("已启动翻译守护进程")
+    except Exception as e:
+        logger.warning(f"守护进程启动失败: {e}")
+
+
+def main() -> None:
+    """主程序入口.
+
+    解析参数，验证输入，调用翻译管理器，并立即打印结果给espanso。
+    后台任务（音频生成、diff生成、自动播放）异步执行。
+    """
+    start_time = time.time()
+
+    # 设置日志记录
+    log_file = Path(__file__).parent.parent / "logs" / "translation.log"
+    logger = setup_logging(log_file=str(log_file))
+
+    logger.info("=" * 50)
+    logger.info("开始新的翻译请求")
+    logger.info(f"命令行参数: {sys.argv}")
+
+    if len(sys.argv) != 2:
+        error_msg = '用法错误: python main.py "<text>"'
+        logger.error(error_msg)
+        _write_stdout('❌ 用法错误: python main.py "<text>"')
+        return
+
+    original = sys.argv[1]
+    if not original.strip():
+        error_msg = "未提供要翻译的文本"
+        logger.error(error_msg)
+        _write_stdout("❌ 错误: 未提供要翻译的文本!")
+        return
+
+    logger.info(f"输入文本长度: {len(original)}字符")
+    logger.debug(f"输入文本: {original[:100]}{'...' if len(original) > 100 else ''}")
+
+    try:
+        config = ConfigManager()
+        config.validate()
+
+        # 优先尝试常驻守护进程（如果启用），命中时省去重量级导入
+        translated: str | None = None
+        if config.use_daemon:
+            translated = _translate_via_daemon(original, config, logger)
+            if translated is None:
+                # 本次回退到进程内翻译，同时后台拉起守护进程供下次使用
+                _spawn_daemon(logger)
+
+        translation_manager = None
+        if translated is None:
+            # 延迟导入，守护进程命中时完全跳过重量级依赖
+            from core import ServiceFactory
+
+            factory = ServiceFactory()
+            translation_manager = factory.get_translation_manager(config)
+
+            # 翻译文本（立即返回结果，后台调度推迟到stdout写出之后）
+            translated = translation_manager.translate_text(original, defer_background=True)
+
+        total_time = time.time() - start_time
+        logger.info(f"翻译请求完成，总耗时: {total_time:.2f}秒")
+        logger.info(f"翻译结果: {translated[:100]}{'...' if len(translated) > 100 else ''}")
+
+        # 立即输出翻译结果给espanso，后台调度在写出之后才开始
+        _write_stdout(translated)
+
+        if translation_manager is not None:
+            translation_manager.start_deferred_background()
+
+    except FileNotFoundError as e:
+        error_msg = f"配置文件错误: {e}"
+        logger.error(error_msg, exc_info=True)
+        _write_stdout(f"❌ 配置文件错误: {e}")
+    except ValueError as e:
+        error_msg = f"配置错误: {e}"
+        logger.error(error_msg, exc_info=True)
+        _write_stdout(f"❌ 配置错误: {e}")
+    except Exception as e:
+        total_time = time.time() - start_time
+        error_msg = f"翻译失败: {e}"
+        logger.error(f"{error_msg}，总耗时: {total_time:.2f}秒", exc_info=True)
+        _write_stdout(f"❌ 翻译失败: {e}")
+
+    finally:
+        logger.info("翻译请求结束")
+        logger.info("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,37 @@
-"""服务包."""
-
-from src.services.audio_service import AudioService
-from src.services.diff_service import DiffService
-from src.services.llm_service import LLMService
-
-__all__ = ["AudioService", "DiffService", "LLMService"]
+"""服务包.
+
+各服务类按首次访问延迟导入（PEP 562），只用到LLMService的快路径
+不会连带导入edge_tts等重量级依赖。
+"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.services.audio_service import AudioService
+    from src.services.cache_service import CacheService
+    from src.services.diff_service import DiffService
+    from src.services.llm_service import LLMService
+
+__all__ = ["AudioService", "CacheService", "DiffService", "LLMService"]
+
+# 服务类名到其所在模块的映射
+_SERVICE_MODULES = {
+    "AudioService": "audio_service",
+    "CacheService": "cache_service",
+    "DiffService": "diff_service",
+    "LLMService": "llm_service",
+}
+
+
+def __getattr__(name: str):
+    """按需导入服务类（PEP 562）."""
+    module_name = _SERVICE_MODULES.get(name)
+    if module_name is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    import importlib
+
+    module = importlib.import_module(f"src.services.{module_name}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
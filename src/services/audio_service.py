@@ -1,177 +1,676 @@
-"""音频服务模块.
-
-处理TTS生成和音频播放。支持详细的日志记录和错误处理。
-"""
-
-import time
-from pathlib import Path
-
-from edge_tts import Communicate
-from playsound import playsound
-from src.config import ConfigManager
-from src.utils import get_logger
-
-
-class AudioService:
-    """音频服务类.
-
-    处理TTS生成和音频播放。支持详细的日志记录和错误处理。
-    """
-
-    def __init__(self, config: ConfigManager) -> None:
-        """初始化音频服务.
-
-        Args:
-            config: 配置管理器
-        """
-        self.config = config
-        self.logger = get_logger("AudioService")
-        self._last_audio_file: str | None = None
-
-    async def generate_tts_audio(
-        self,
-        text: str,
-        file_path: str | None = None,
-        sound_name: str | None = None,
-    ) -> str:
-        """生成TTS音频.
-
-        Args:
-            text: 要转换的文本
-            file_path: 输出文件名
-            sound_name: 语音名称
-
-        Returns
-        -------
-            生成的音频文件路径
-
-        Raises
-        ------
-            Exception: 音频生成过程中的任何错误
-        """
-        start_time = time.time()
-
-        if file_path is None:
-            file_path = self.config.audio_file_path
-
-        if sound_name is None:
-            sound_name = self.config.sound_name
-
-        self.logger.info(f"开始生成TTS音频，文本长度: {len(text)}字符")
-        self.logger.debug(f"使用语音: {sound_name}")
-        self.logger.debug(f"输出文件: {file_path}")
-
-        try:
-            # 确保输出目录存在
-            output_path = Path(file_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # 生成音频
-            communicate = Communicate(text, sound_name)
-            await communicate.save(file_path)
-
-            # 验证文件是否生成成功
-            if not Path(file_path).exists():
-                msg = f"音频文件生成失败: {file_path}"
-                self._raise_error(msg)
-
-            self._last_audio_file = file_path
-
-            tts_time = time.time() - start_time
-            file_size = Path(file_path).stat().st_size / 1024  # KB
-            self.logger.info(
-                f"TTS音频生成成功，耗时: {tts_time:.2f}秒，文件大小: {file_size:.1f}KB",
-            )
-
-        except Exception as e:
-            tts_time = time.time() - start_time
-            self.logger.error(f"TTS音频生成失败，耗时: {tts_time:.2f}秒，错误: {e}", exc_info=True)
-            self._raise_error(f"音频生成失败: {e}", e)
-        else:
-            return file_path
-
-    def play_audio(self, filepath: str, *, block: bool = True) -> None:
-        """播放音频文件.
-
-        Args:
-            filepath: 音频文件路径
-            block: 是否阻塞播放
-
-        Raises
-        ------
-            FileNotFoundError: 音频文件不存在
-            Exception: 播放过程中的任何错误
-        """
-        start_time = time.time()
-        self.logger.info(f"开始播放音频文件: {filepath}")
-        self.logger.debug(f"阻塞播放: {block}")
-
-        if not Path(filepath).exists():
-            msg = f"音频文件不存在: {filepath}"
-            self._raise_error(msg)
-
-        try:
-            # 获取文件信息
-            file_size = Path(filepath).stat().st_size / 1024  # KB
-            self.logger.debug(f"音频文件大小: {file_size:.1f}KB")
-
-            # 播放音频
-            playsound(filepath, block=block)
-
-            play_time = time.time() - start_time
-            self.logger.info(f"音频播放完成，耗时: {play_time:.2f}秒")
-
-        except Exception as e:
-            play_time = time.time() - start_time
-            self.logger.error(f"音频播放失败，耗时: {play_time:.2f}秒，错误: {e}", exc_info=True)
-            raise Exception(f"音频播放失败: {e}") from e
-
-    def play_last_audio(self, *, block: bool = True) -> None:
-        """播放最后生成的音频.
-
-        Args:
-            block: 是否阻塞播放
-
-        Raises
-        ------
-            ValueError: 没有可播放的音频文件
-        """
-        if self._last_audio_file is None:
-            msg = "没有可播放的音频文件"
-            self._raise_error(msg)
-
-        self.play_audio(self._last_audio_file, block=block)
-
-    @property
-    def last_audio_file(self) -> str | None:
-        """获取最后生成的音频文件路径."""
-        return self._last_audio_file
-
-    def test_tts_connection(self) -> bool:
-        """测试TTS服务连接.
-
-        Returns
-        -------
-            连接是否成功
-        """
-        try:
-            self.logger.info("测试TTS服务连接")
-
-            # 尝试创建一个简单的Communicate对象
-            communicate = Communicate("Test", self.config.sound_name)
-
-            self.logger.info("TTS服务连接测试成功")
-
-        except Exception as e:
-            self.logger.error(f"TTS服务连接测试失败: {e}", exc_info=True)
-            return False
-        else:
-            return True
-
-    def _raise_error(self, msg: str, exc: Exception = None) -> None:
-        """统一异常抛出和日志记录."""
-        if exc is not None:
-            self.logger.error(msg, exc_info=True)
-            raise Exception(msg) from exc
-        self.logger.error(msg)
-        raise Exception(msg)
+"""音频服务模块.
+
+处理TTS生成和音频播放。支持详细的日志记录和错误处理。
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from src.config import ConfigManager
+from src.utils import get_logger
+
+
+# 句子边界：CJK标点后不要求空白（中文句子之间没有空格），
+# 西文标点后必须跟空白，避免把"3.14"之类误切
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[。！？])\s*|(?<=[.!?])\s+")
+
+# 并发TTS请求上限，避免触发edge-tts服务端限流
+_MAX_CONCURRENT_TTS = 4
+
+
+def _tts_cache_path(text: str, sound_name: str) -> Path:
+    """计算(文本, 语音)对应的TTS缓存文件路径.
+
+    Args:
+        text: 合成文本
+        sound_name: 语音名称
+
+    Returns
+    -------
+        临时目录下按blake2b哈希命名的缓存文件路径
+    """
+    # blake2b比sha256更快，16字节摘要足以避免碰撞
+    digest = hashlib.blake2b(f"{sound_name}|{text}".encode(), digest_size=16).hexdigest()
+    return Path(tempfile.gettempdir()) / "espanso-llm-tts-cache" / f"{digest}.mp3"
+
+
+def _read_tts_cache(text: str, sound_name: str) -> bytes | None:
+    """读取TTS缓存，未命中或读取失败时返回None."""
+    try:
+        return _tts_cache_path(text, sound_name).read_bytes()
+    except OSError:
+        return None
+
+
+# 缓存条目数上限，超出时按修改时间淘汰最旧的条目
+_TTS_CACHE_MAX_ENTRIES = 256
+
+
+def _write_tts_cache(text: str, sound_name: str, data: bytes) -> None:
+    """写入TTS缓存，失败时静默忽略（缓存不影响正常流程）.
+
+    先写临时文件再os.replace，并发写入时读端不会看到半截MP3。
+    """
+    try:
+        cache_path = _tts_cache_path(text, sound_name)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.parent / f"{cache_path.name}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, cache_path)
+        _evict_tts_cache(cache_path.parent)
+    except OSError:
+        pass
+
+
+def _evict_tts_cache(cache_dir: Path) -> None:
+    """缓存条目超限时淘汰最旧的条目，失败时静默忽略."""
+    try:
+        entries = [e for e in os.scandir(cache_dir) if e.name.endswith(".mp3")]
+        if len(entries) <= _TTS_CACHE_MAX_ENTRIES:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[: len(entries) - _TTS_CACHE_MAX_ENTRIES]:
+            Path(entry.path).unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+class AudioService:
+    """音频服务类.
+
+    处理TTS生成和音频播放。支持详细的日志记录和错误处理。
+    """
+
+    def __init__(self, config: ConfigManager) -> None:
+        """初始化音频服务.
+
+        Args:
+            config: 配置管理器
+        """
+        self.config = config
+        self.logger = get_logger("AudioService")
+        self._last_audio_file: str | None = None
+        # 复用的TTS连接器（绑定事件循环，跨调用保持keep-alive连接）
+        self._tts_connector = None
+        self._tts_connector_loop: asyncio.AbstractEventLoop | None = None
+        self._tts_connector_unsupported = False
+        # 已确认存在的输出目录，跳过重复的mkdir系统调用
+        self._ensured_dirs: set[str] = set()
+
+    def _ensure_parent_dir(self, path: Path) -> None:
+        """确保输出目录存在（每个目录只做一次mkdir）.
+
+        Args:
+            path: 输出文件路径
+        """
+        parent = str(path.parent)
+        if parent not in self._ensured_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(parent)
+
+    def _get_tts_connector(self):
+        """获取绑定当前事件循环的共享TCP连接器.
+
+        连接器跨Communicate调用复用keep-alive连接，后续合成可以
+        跳过到TTS服务端的TLS握手。连接器与事件循环绑定，循环
+        变化时重建。
+
+        Returns
+        -------
+            共享的aiohttp连接器，不可用时为None
+        """
+        if self._tts_connector_unsupported:
+            return None
+        try:
+            import aiohttp
+        except ImportError:
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._tts_connector is None or self._tts_connector_loop is not loop:
+            self._tts_connector = aiohttp.TCPConnector(limit=4, keepalive_timeout=60)
+            self._tts_connector_loop = loop
+        return self._tts_connector
+
+    def _make_communicate(self, text: str, sound_name: str):
+        """创建Communicate对象，尽可能复用共享连接器.
+
+        旧版edge-tts不接受connector参数，首次TypeError后不再尝试。
+
+        Args:
+            text: 合成文本
+            sound_name: 语音名称
+
+        Returns
+        -------
+            Communicate对象
+        """
+        from edge_tts import Communicate
+
+        connector = self._get_tts_connector()
+        if connector is not None:
+            try:
+                return Communicate(text, sound_name, connector=connector)
+            except TypeError:
+                self._tts_connector_unsupported = True
+                self.logger.debug("当前edge-tts版本不支持connector参数，退回独立连接")
+        return Communicate(text, sound_name)
+
+    async def generate_tts_audio(
+        self,
+        text: str,
+        file_path: str | None = None,
+        sound_name: str | None = None,
+    ) -> str:
+        """生成TTS音频.
+
+        Args:
+            text: 要转换的文本
+            file_path: 输出文件名
+            sound_name: 语音名称
+
+        Returns
+        -------
+            生成的音频文件路径
+
+        Raises
+        ------
+            Exception: 音频生成过程中的任何错误
+        """
+        start_time = time.time()
+
+        if file_path is None:
+            file_path = self.config.audio_file_path
+
+        if sound_name is None:
+            sound_name = self.config.sound_name
+
+        self.logger.info("开始生成TTS音频，文本长度: %d字符", len(text))
+        self.logger.debug("使用语音: %s", sound_name)
+        self.logger.debug("输出文件: %s", file_path)
+
+        try:
+            # 确保输出目录存在
+            output_path = Path(file_path)
+            self._ensure_parent_dir(output_path)
+
+            # 相同(文本, 语音)命中本地缓存时直接复制，跳过整个TTS往返
+            cached = _read_tts_cache(text, sound_name)
+            if cached is not None:
+                self.logger.info("TTS缓存命中，跳过合成")
+                output_path.write_bytes(cached)
+            else:
+                # 生成音频（延迟导入edge_tts，不生成音频的进程不付导入开销）
+                communicate = self._make_communicate(text, sound_name)
+                await communicate.save(file_path)
+                _write_tts_cache(text, sound_name, output_path.read_bytes())
+
+            # 单次stat同时完成存在性检查和取文件大小
+            try:
+                file_size = os.stat(file_path).st_size / 1024  # KB
+            except FileNotFoundError:
+                msg = f"音频文件生成失败: {file_path}"
+                self._raise_error(msg)
+
+            self._last_audio_file = file_path
+
+            tts_time = time.time() - start_time
+            self.logger.info(
+                f"TTS音频生成成功，耗时: {tts_time:.2f}秒，文件大小: {file_size:.1f}KB",
+            )
+
+        except Exception as e:
+            tts_time = time.time() - start_time
+            self.logger.error(f"TTS音频生成失败，耗时: {tts_time:.2f}秒，错误: {e}", exc_info=True)
+            self._raise_error(f"音频生成失败: {e}", e)
+        else:
+            return file_path
+
+    @staticmethod
+    def _split_sentences(text: str) -> list[str]:
+        """按句子边界拆分文本.
+
+        Args:
+            text: 要拆分的文本
+
+        Returns
+        -------
+            句子列表（至少包含一个元素）
+        """
+        sentences = [s for s in _SENTENCE_BOUNDARY.split(text.strip()) if s]
+        return sentences or [text]
+
+    async def _collect_tts_chunks(
+        self,
+        sentence: str,
+        sound_name: str,
+        semaphore: asyncio.Semaphore,
+    ) -> bytes:
+        """合成单句音频并收集全部音频块.
+
+        Args:
+            sentence: 单句文本
+            sound_name: 语音名称
+            semaphore: 并发限制信号量
+
+        Returns
+        -------
+            该句的完整音频字节
+        """
+        # 相同(句子, 语音)命中缓存时直接返回，跳过TTS往返
+        cached = _read_tts_cache(sentence, sound_name)
+        if cached is not None:
+            return cached
+
+        async with semaphore:
+            chunks = []
+            async for chunk in self._make_communicate(sentence, sound_name).stream():
+                if chunk["type"] == "audio":
+                    chunks.append(chunk["data"])
+            data = b"".join(chunks)
+            _write_tts_cache(sentence, sound_name, data)
+            return data
+
+    @staticmethod
+    def split_complete_sentences(buffer: str) -> tuple[list[str], str]:
+        """从累积缓冲中切出已完整的句子.
+
+        Args:
+            buffer: 流式累积的文本缓冲
+
+        Returns
+        -------
+            已完整的句子列表和剩余的未完成部分
+        """
+        pieces = _SENTENCE_BOUNDARY.split(buffer)
+        return [s for s in pieces[:-1] if s], pieces[-1]
+
+    @staticmethod
+    def _find_stream_player() -> list[str] | None:
+        """查找可用的流式播放器命令.
+
+        Returns
+        -------
+            播放器命令行参数列表，未找到可用播放器时为None
+        """
+        if shutil.which("ffplay"):
+            return ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"]
+        if shutil.which("mpv"):
+            return ["mpv", "--no-cache", "--really-quiet", "-"]
+        return None
+
+    async def stream_tts_audio(
+        self,
+        text: str,
+        file_path: str | None = None,
+        sound_name: str | None = None,
+    ) -> str:
+        """流式生成并播放TTS音频.
+
+        将edge-tts的音频块边下载边送入播放器，首块到达即开始播放，
+        同时写入文件供重播。没有可用播放器时回退到先保存再播放。
+
+        Args:
+            text: 要转换的文本
+            file_path: 输出文件名
+            sound_name: 语音名称
+
+        Returns
+        -------
+            生成的音频文件路径
+
+        Raises
+        ------
+            Exception: 音频生成或播放过程中的任何错误
+        """
+        player_cmd = self._find_stream_player()
+        if player_cmd is None:
+            self.logger.debug("未找到流式播放器，回退到保存后播放")
+            file_path = await self.generate_tts_audio(text, file_path, sound_name)
+            # 同步播放放到工作线程，整段播放期间不阻塞事件循环
+            await asyncio.to_thread(self.play_blocking, file_path)
+            return file_path
+
+        start_time = time.time()
+
+        if file_path is None:
+            file_path = self.config.audio_file_path
+
+        if sound_name is None:
+            sound_name = self.config.sound_name
+
+        self.logger.info("开始流式生成TTS音频，文本长度: %d字符", len(text))
+        self.logger.debug("使用播放器: %s", player_cmd[0])
+
+        try:
+            output_path = Path(file_path)
+            self._ensure_parent_dir(output_path)
+
+            proc = await asyncio.create_subprocess_exec(
+                *player_cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+
+            first_chunk_time: float | None = None
+            sentences = self._split_sentences(text)
+            with Path.open(output_path, "wb") as f:
+                if (cached := _read_tts_cache(text, sound_name)) is not None:
+                    # 缓存命中：跳过合成，直接播放
+                    self.logger.info("TTS缓存命中，跳过合成")
+                    f.write(cached)
+                    proc.stdin.write(cached)
+                    await proc.stdin.drain()
+                elif len(sentences) == 1:
+                    # 单句：直接流式播放
+                    collected: list[bytes] = []
+                    communicate = self._make_communicate(text, sound_name)
+                    async for chunk in communicate.stream():
+                        if chunk["type"] != "audio":
+                            continue
+                        if first_chunk_time is None:
+                            first_chunk_time = time.time() - start_time
+                            self.logger.info("首个音频块到达，耗时: %.2f秒", first_chunk_time)
+                        collected.append(chunk["data"])
+                        f.write(chunk["data"])
+                        proc.stdin.write(chunk["data"])
+                        await proc.stdin.drain()
+                    _write_tts_cache(text, sound_name, b"".join(collected))
+                else:
+                    # 多句：并发合成各句，按原顺序送入播放器
+                    self.logger.debug("按句拆分为%d段并发合成", len(sentences))
+                    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_TTS)
+                    tasks = [
+                        asyncio.ensure_future(
+                            self._collect_tts_chunks(sentence, sound_name, semaphore),
+                        )
+                        for sentence in sentences
+                    ]
+                    for task in tasks:
+                        data = await task
+                        if first_chunk_time is None:
+                            first_chunk_time = time.time() - start_time
+                            self.logger.info("首段音频就绪，耗时: %.2f秒", first_chunk_time)
+                        f.write(data)
+                        proc.stdin.write(data)
+                        await proc.stdin.drain()
+
+            proc.stdin.close()
+            await proc.wait()
+
+            self._last_audio_file = file_path
+
+            total_time = time.time() - start_time
+            self.logger.info("流式TTS播放完成，总耗时: %.2f秒", total_time)
+
+        except Exception as e:
+            total_time = time.time() - start_time
+            self.logger.error(
+                f"流式TTS播放失败，耗时: {total_time:.2f}秒，错误: {e}",
+                exc_info=True,
+            )
+            self._raise_error(f"音频生成失败: {e}", e)
+        else:
+            return file_path
+
+    async def stream_tts_from_queue(
+        self,
+        queue: asyncio.Queue,
+        file_path: str | None = None,
+        sound_name: str | None = None,
+    ) -> str | None:
+        """消费句子队列，与上游文本生成重叠地合成并播放音频.
+
+        上游（LLM流式翻译）每产出一个完整句子就放入队列，本协程
+        立即启动该句的TTS合成，使TTS与LLM解码并行，隐藏大部分
+        TTS耗时。各句音频按原顺序送入播放器并拼接写入重播文件
+        （edge-tts的MP3块可直接拼接）。队列以None作为结束标记。
+
+        作为fire-and-forget任务运行，失败只记录日志不向上抛出。
+
+        Args:
+            queue: 句子队列，None表示上游结束
+            file_path: 输出文件名
+            sound_name: 语音名称
+
+        Returns
+        -------
+            生成的音频文件路径，失败时为None
+        """
+        if file_path is None:
+            file_path = self.config.audio_file_path
+
+        if sound_name is None:
+            sound_name = self.config.sound_name
+
+        start_time = time.time()
+
+        try:
+            player_cmd = self._find_stream_player()
+            if player_cmd is None:
+                # 无流式播放器：收完全部句子后整体合成再播放
+                sentences = []
+                while (sentence := await queue.get()) is not None:
+                    sentences.append(sentence)
+                if not sentences:
+                    return None
+                file_path = await self.generate_tts_audio(" ".join(sentences), file_path, sound_name)
+                # 同步播放放到工作线程，整段播放期间不阻塞事件循环
+                await asyncio.to_thread(self.play_blocking, file_path)
+                return file_path
+
+            output_path = Path(file_path)
+            self._ensure_parent_dir(output_path)
+
+            proc = await asyncio.create_subprocess_exec(
+                *player_cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+
+            semaphore = asyncio.Semaphore(_MAX_CONCURRENT_TTS)
+            tasks: list[asyncio.Task] = []
+            next_write = 0
+            first_chunk_time: float | None = None
+
+            with Path.open(output_path, "wb") as f:
+
+                async def _flush_ready(*, wait: bool) -> None:
+                    nonlocal next_write, first_chunk_time
+                    while next_write < len(tasks) and (wait or tasks[next_write].done()):
+                        data = await tasks[next_write]
+                        next_write += 1
+                        if first_chunk_time is None:
+                            first_chunk_time = time.time() - start_time
+                            self.logger.info("首段音频就绪，耗时: %.2f秒", first_chunk_time)
+                        f.write(data)
+                        proc.stdin.write(data)
+                        await proc.stdin.drain()
+
+                # 句子一到即启动合成，已就绪的前缀段顺序送入播放器
+                while (sentence := await queue.get()) is not None:
+                    tasks.append(
+                        asyncio.ensure_future(
+                            self._collect_tts_chunks(sentence, sound_name, semaphore),
+                        ),
+                    )
+                    await _flush_ready(wait=False)
+
+                await _flush_ready(wait=True)
+
+            proc.stdin.close()
+            await proc.wait()
+
+            if not tasks:
+                return None
+
+            self._last_audio_file = file_path
+
+            total_time = time.time() - start_time
+            self.logger.info("逐句流式TTS播放完成，总耗时: %.2f秒", total_time)
+
+        except Exception as e:
+            total_time = time.time() - start_time
+            self.logger.error(
+                f"逐句流式TTS播放失败，耗时: {total_time:.2f}秒，错误: {e}",
+                exc_info=True,
+            )
+            return None
+        else:
+            return file_path
+
+    def play_blocking(self, filepath: str) -> None:
+        """阻塞播放音频文件，播放结束后返回.
+
+        Args:
+            filepath: 音频文件路径
+
+        Raises
+        ------
+            FileNotFoundError: 音频文件不存在
+            Exception: 播放过程中的任何错误
+        """
+        start_time = time.time()
+        self.logger.info("开始播放音频文件: %s", filepath)
+
+        if not Path(filepath).exists():
+            msg = f"音频文件不存在: {filepath}"
+            self._raise_error(msg)
+
+        try:
+            # 获取文件信息
+            file_size = Path(filepath).stat().st_size / 1024  # KB
+            self.logger.debug("音频文件大小: %.1fKB", file_size)
+
+            # 优先使用miniaudio（原生解码，启动开销远低于playsound），
+            # 未安装或播放失败时回退到playsound
+            if not self._play_with_miniaudio(filepath):
+                from playsound import playsound
+
+                playsound(filepath, block=True)
+
+            play_time = time.time() - start_time
+            self.logger.info("音频播放完成，耗时: %.2f秒", play_time)
+
+        except Exception as e:
+            play_time = time.time() - start_time
+            self.logger.error(f"音频播放失败，耗时: {play_time:.2f}秒，错误: {e}", exc_info=True)
+            raise Exception(f"音频播放失败: {e}") from e
+
+    def play_async(self, filepath: str) -> None:
+        """非阻塞播放音频文件，启动播放后立即返回.
+
+        Args:
+            filepath: 音频文件路径
+
+        Raises
+        ------
+            FileNotFoundError: 音频文件不存在
+            Exception: 播放启动过程中的任何错误
+        """
+        self.logger.info("开始非阻塞播放音频文件: %s", filepath)
+
+        if not Path(filepath).exists():
+            msg = f"音频文件不存在: {filepath}"
+            self._raise_error(msg)
+
+        try:
+            from playsound import playsound
+
+            playsound(filepath, block=False)
+        except Exception as e:
+            self.logger.error(f"音频播放失败: {e}", exc_info=True)
+            raise Exception(f"音频播放失败: {e}") from e
+
+    def _play_with_miniaudio(self, filepath: str) -> bool:
+        """使用miniaudio阻塞播放音频.
+
+        Args:
+            filepath: 音频文件路径
+
+        Returns
+        -------
+            是否成功播放（miniaudio未安装或播放失败时为False）
+        """
+        try:
+            import miniaudio
+        except ImportError:
+            return False
+
+        import threading
+
+        try:
+            finished = threading.Event()
+            stream = miniaudio.stream_with_callbacks(
+                miniaudio.stream_file(filepath),
+                end_callback=finished.set,
+            )
+            next(stream)  # 预热生成器，使其可被播放设备驱动
+            device = miniaudio.PlaybackDevice()
+            try:
+                device.start(stream)
+                finished.wait()
+            finally:
+                device.close()
+        except (miniaudio.MiniaudioError, OSError) as e:
+            # 只在解码/设备错误时回退playsound，其余异常向上冒泡
+            self.logger.warning(f"miniaudio播放失败，回退到playsound: {e}")
+            return False
+        return True
+
+    def play_last_audio(self) -> None:
+        """播放最后生成的音频.
+
+        Raises
+        ------
+            ValueError: 没有可播放的音频文件
+        """
+        if self._last_audio_file is None:
+            msg = "没有可播放的音频文件"
+            self._raise_error(msg)
+
+        self.play_blocking(self._last_audio_file)
+
+    @property
+    def last_audio_file(self) -> str | None:
+        """获取最后生成的音频文件路径."""
+        return self._last_audio_file
+
+    def test_tts_connection(self) -> bool:
+        """测试TTS服务连接.
+
+        Returns
+        -------
+            连接是否成功
+        """
+        try:
+            self.logger.info("测试TTS服务连接")
+
+            # 尝试创建一个简单的Communicate对象
+            from edge_tts import Communicate
+
+            communicate = Communicate("Test", self.config.sound_name)
+
+            self.logger.info("TTS服务连接测试成功")
+
+        except Exception as e:
+            self.logger.error(f"TTS服务连接测试失败: {e}", exc_info=True)
+            return False
+        else:
+            return True
+
+    def _raise_error(self, msg: str, exc: Exception = None) -> None:
+        """统一异常抛出和日志记录."""
+        if exc is not None:
+            self.logger.error(msg, exc_info=True)
+            raise Exception(msg) from exc
+        self.logger.error(msg)
+        raise Exception(msg)
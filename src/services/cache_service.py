@@ -0,0 +1,133 @@
+"""翻译缓存服务模块.
+
+基于sqlite3的本地翻译缓存，命中时跳过LLM网络往返。
+缓存键包含模型、目标语言、系统提示和原文，任一变化都会触发重新翻译。
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+from src.config import ConfigManager
+from src.utils import get_logger
+
+# 缓存行数上限与最大保留时长（秒），写入时顺带清理
+_MAX_CACHE_ROWS = 5000
+_MAX_CACHE_AGE = 90 * 86400
+
+
+class CacheService:
+    """翻译缓存服务类.
+
+    以sha256(模型|目标语言|系统提示|原文)为键，缓存翻译结果到
+    本地sqlite数据库。命中时亚毫秒级返回，跳过完整的LLM网络往返。
+    写入时按行数和时间做清理，数据库不会无限增长。
+    """
+
+    def __init__(self, config: ConfigManager) -> None:
+        """初始化缓存服务.
+
+        Args:
+            config: 配置管理器
+        """
+        self.config = config
+        self.logger = get_logger("CacheService")
+        self._conn: sqlite3.Connection | None = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取数据库连接（延迟创建）.
+
+        Returns
+        -------
+            sqlite3连接
+        """
+        if self._conn is None:
+            cache_path = Path(self.config.cache_path)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(cache_path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "hash TEXT PRIMARY KEY, prompt TEXT, response TEXT, ts INTEGER)",
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, target_language: str, system_prompt: str, text: str) -> str:
+        """计算缓存键.
+
+        系统提示参与哈希：修改system_prompt.txt后旧缓存自动失效，
+        不会一直返回按旧提示生成的译文。
+
+        Args:
+            model: 模型名称
+            target_language: 目标语言
+            system_prompt: 系统提示内容
+            text: 原文
+
+        Returns
+        -------
+            sha256十六进制摘要
+        """
+        payload = f"{model}|{target_language}|{system_prompt}|{text}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """查询缓存.
+
+        Args:
+            key: 缓存键
+
+        Returns
+        -------
+            缓存的翻译结果，未命中时为None
+        """
+        try:
+            conn = self._get_connection()
+            row = conn.execute("SELECT response FROM cache WHERE hash=?", (key,)).fetchone()
+        except Exception as e:
+            self.logger.warning(f"读取翻译缓存失败: {e}")
+            return None
+        if row is None:
+            return None
+        return row[0]
+
+    def put(self, key: str, prompt: str, response: str) -> None:
+        """写入缓存.
+
+        Args:
+            key: 缓存键
+            prompt: 原文
+            response: 翻译结果
+        """
+        try:
+            conn = self._get_connection()
+            now = int(time.time())
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (hash, prompt, response, ts) VALUES (?, ?, ?, ?)",
+                (key, prompt, response, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+        except Exception as e:
+            self.logger.warning(f"写入翻译缓存失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: int) -> None:
+        """清理过期和超量的缓存行.
+
+        写入路径不在交互热路径上（译文已返回espanso），
+        顺带做清理不影响感知延迟。
+
+        Args:
+            conn: 数据库连接
+            now: 当前Unix时间戳
+        """
+        conn.execute("DELETE FROM cache WHERE ts < ?", (now - _MAX_CACHE_AGE,))
+        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > _MAX_CACHE_ROWS:
+            conn.execute(
+                "DELETE FROM cache WHERE hash IN "
+                "(SELECT hash FROM cache ORDER BY ts LIMIT ?)",
+                (count - _MAX_CACHE_ROWS,),
+            )
@@ -1,195 +1,371 @@
-"""LLM服务模块.
-
-负责与AI模型交互，处理翻译请求。优化为支持详细的日志记录和错误处理。
-支持代理配置。
-"""
-
-import asyncio
-import time
-from pathlib import Path
-from string import Template
-
-import httpx
-from openai import OpenAI
-from src.config import ConfigManager
-from src.utils import get_logger
-
-
-class LLMService:
-    """LLM服务类.
-
-    负责与AI模型交互，处理翻译请求。支持详细的日志记录和错误处理。
-    支持代理配置。
-    """
-
-    def __init__(self, config: ConfigManager) -> None:
-        """初始化LLM服务.
-
-        Args:
-            config: 配置管理器
-        """
-        self.config = config
-        self.logger = get_logger("LLMService")
-        self._system_prompt: str | None = None
-
-        # 构建客户端配置
-        client_kwargs = {
-            "api_key": config.api_key,
-            "base_url": config.base_url,
-        }
-
-        # 添加代理配置（如果配置了）
-        if hasattr(config, "proxy") and config.proxy:
-            client_kwargs["http_client"] = self._create_proxy_client(config.proxy)
-            self.logger.info(f"使用代理: {config.proxy}")
-
-        self.client = OpenAI(**client_kwargs)
-
-    def _create_proxy_client(self, proxy_url: str) -> httpx.Client | None:
-        """创建代理客户端.
-
-        Args:
-            proxy_url: 代理URL
-
-        Returns
-        -------
-            配置了代理的HTTP客户端
-        """
-        try:
-            return httpx.Client(
-                proxies=proxy_url,
-                timeout=30.0,
-            )
-        except ImportError:
-            self.logger.warning("httpx未安装，无法使用代理功能")
-            return None
-
-    def _load_system_prompt(self) -> str:
-        """加载系统提示.
-
-        Returns
-        -------
-            系统提示内容
-
-        Raises
-        ------
-            FileNotFoundError: 系统提示文件不存在
-        """
-        if self._system_prompt is None:
-            prompt_file = Path(self.config.system_prompt_file)
-            if not prompt_file.exists():
-                msg = f"系统提示文件不存在: {prompt_file}"
-                self.logger.error(msg)
-                raise FileNotFoundError(msg)
-
-            try:
-                with Path.open(prompt_file, encoding="utf-8") as f:
-                    self._system_prompt = f.read()
-                self.logger.debug(f"成功加载系统提示文件: {prompt_file}")
-            except Exception as e:
-                msg = f"读取系统提示文件失败: {e}"
-                self.logger.error(msg)
-                raise FileNotFoundError(msg) from e
-
-        return self._system_prompt
-
-    def translate(self, text: str) -> str:
-        """翻译文本.
-
-        Args:
-            text: 要翻译的文本
-
-        Returns
-        -------
-            翻译结果
-
-        Raises
-        ------
-            Exception: 翻译过程中的任何错误
-        """
-        start_time = time.time()
-        self.logger.info(f"开始调用LLM API翻译文本: {text[:50]}{'...' if len(text) > 50 else ''}")
-
-        try:
-            # 加载系统提示
-            system_prompt = self._load_system_prompt()
-            template = Template(system_prompt)
-            formatted_prompt = template.substitute(TARGET_LANGUAGE=self.config.target_language)
-
-            self.logger.debug(f"使用模型: {self.config.model}")
-            self.logger.debug(f"目标语言: {self.config.target_language}")
-
-            # 调用LLM API
-            response = self.client.chat.completions.create(
-                model=self.config.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": formatted_prompt,
-                    },
-                    {
-                        "role": "user",
-                        "content": text,
-                    },
-                ],
-                stream=False,
-                timeout=30,  # 30秒超时
-            )
-
-            translated_text = response.choices[0].message.content.strip()
-
-            api_time = time.time() - start_time
-            self.logger.info(f"LLM API调用成功，耗时: {api_time:.2f}秒")
-            self.logger.debug(
-                f"翻译结果: {translated_text[:100]}{'...' if len(translated_text) > 100 else ''}",
-            )
-
-        except Exception as e:
-            api_time = time.time() - start_time
-            self.logger.error(f"LLM API调用失败，耗时: {api_time:.2f}秒，错误: {e}", exc_info=True)
-            msg = f"翻译失败: {e}"
-            raise Exception(msg) from e
-        else:
-            return translated_text
-
-    async def translate_async(self, text: str) -> str:
-        """异步翻译文本.
-
-        Args:
-            text: 要翻译的文本
-
-        Returns
-        -------
-            翻译结果
-        """
-        # 在线程池中运行同步方法
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.translate, text)
-
-    def test_connection(self) -> bool:
-        """测试LLM API连接.
-
-        Returns
-        -------
-            连接是否成功
-        """
-        try:
-            self.logger.info("测试LLM API连接")
-
-            # 发送一个简单的测试请求
-            response = self.client.chat.completions.create(
-                model=self.config.model,
-                messages=[
-                    {"role": "user", "content": "Hello"},
-                ],
-                max_tokens=10,
-                timeout=10,  # 10秒超时
-            )
-
-            self.logger.info("LLM API连接测试成功")
-
-        except Exception as e:
-            self.logger.error(f"LLM API连接测试失败: {e}", exc_info=True)
-            return False
-        else:
-            return True
+"""LLM服务模块.
+
+负责与AI模型交互，处理翻译请求。优化为支持详细的日志记录和错误处理。
+支持代理配置。
+"""
+
+import asyncio
+import time
+from string import Template
+from typing import TYPE_CHECKING
+
+from src.config import ConfigManager
+from src.utils import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator
+
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+
+class LLMService:
+    """LLM服务类.
+
+    负责与AI模型交互，处理翻译请求。支持详细的日志记录和错误处理。
+    支持代理配置。
+    """
+
+    def __init__(self, config: ConfigManager) -> None:
+        """初始化LLM服务.
+
+        Args:
+            config: 配置管理器
+        """
+        self.config = config
+        self.logger = get_logger("LLMService")
+        self._system_message: dict[str, str] | None = None
+        self._client: OpenAI | None = None
+        self._async_client: AsyncOpenAI | None = None
+        # 在途请求表：相同(目标语言, 原文)的并发调用合并为一次API请求
+        self._inflight: dict[str, asyncio.Task[str]] = {}
+
+        if config.proxy:
+            self.logger.info(f"使用代理: {config.proxy}")
+
+    def _http_client_kwargs(self) -> dict:
+        """构建httpx客户端参数（keep-alive连接池和代理）.
+
+        Returns
+        -------
+            httpx客户端关键字参数
+        """
+        import httpx
+
+        client_kwargs = {
+            "limits": httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300),
+            # 整体超时来自配置，连接阶段单独收紧，端点不可达时快速失败
+            "timeout": httpx.Timeout(float(self.config.timeout), connect=5.0),
+        }
+        try:
+            # HTTP/2需要可选的h2包，未安装时保持HTTP/1.1
+            import h2  # noqa: F401
+
+            client_kwargs["http2"] = True
+        except ImportError:
+            pass
+        if self.config.proxy:
+            # httpx 0.28移除了proxies参数，统一用0.26+的proxy单数形式
+            client_kwargs["proxy"] = self.config.proxy
+        return client_kwargs
+
+    @property
+    def client(self) -> "OpenAI":
+        """获取同步客户端（延迟创建，进程内复用）.
+
+        延迟导入openai/httpx，不需要LLM调用的进程（如diff子进程）
+        完全不用付导入开销。始终使用带keep-alive连接池的httpx客户端，
+        避免每次请求重新建立TCP+TLS连接。
+
+        Returns
+        -------
+            同步OpenAI客户端
+        """
+        if self._client is None:
+            import httpx
+            from openai import OpenAI
+
+            self._client = OpenAI(
+                api_key=self.config.api_key,
+                base_url=self.config.base_url,
+                max_retries=self.config.max_retries,
+                http_client=httpx.Client(**self._http_client_kwargs()),
+            )
+        return self._client
+
+    def _load_system_prompt(self) -> str:
+        """加载系统提示.
+
+        实际缓存由ConfigManager.system_prompt承担，这里只做日志和异常包装。
+
+        Returns
+        -------
+            系统提示内容
+
+        Raises
+        ------
+            FileNotFoundError: 系统提示文件不存在
+        """
+        try:
+            system_prompt = self.config.system_prompt
+        except FileNotFoundError:
+            self.logger.error(f"系统提示文件不存在: {self.config.system_prompt_file}")
+            raise
+        except Exception as e:
+            msg = f"读取系统提示文件失败: {e}"
+            self.logger.error(msg)
+            raise FileNotFoundError(msg) from e
+        return system_prompt
+
+    def _get_system_message(self) -> dict[str, str]:
+        """获取格式化后的系统消息（首次调用后缓存）.
+
+        系统提示和目标语言在进程内不会变化，缓存格式化结果和消息字典，
+        避免每次调用重复做模板替换。
+
+        Returns
+        -------
+            系统消息字典
+        """
+        if self._system_message is None:
+            system_prompt = self._load_system_prompt()
+            template = Template(system_prompt)
+            formatted_prompt = template.substitute(TARGET_LANGUAGE=self.config.target_language)
+            self._system_message = {
+                "role": "system",
+                "content": formatted_prompt,
+            }
+        return self._system_message
+
+    def translate(self, text: str) -> str:
+        """翻译文本.
+
+        Args:
+            text: 要翻译的文本
+
+        Returns
+        -------
+            翻译结果
+
+        Raises
+        ------
+            Exception: 翻译过程中的任何错误
+        """
+        start_time = time.time()
+        self.logger.info("开始调用LLM API翻译文本: %.50s%s", text, "..." if len(text) > 50 else "")
+
+        try:
+            self.logger.debug("使用模型: %s", self.config.model)
+            self.logger.debug("目标语言: %s", self.config.target_language)
+
+            # 调用LLM API
+            response = self.client.chat.completions.create(
+                model=self.config.model,
+                messages=[
+                    self._get_system_message(),
+                    {
+                        "role": "user",
+                        "content": text,
+                    },
+                ],
+                stream=False,
+                timeout=self.config.timeout,
+            )
+
+            translated_text = response.choices[0].message.content.strip()
+
+            api_time = time.time() - start_time
+            self.logger.info("LLM API调用成功，耗时: %.2f秒", api_time)
+            self.logger.debug(
+                f"翻译结果: {translated_text[:100]}{'...' if len(translated_text) > 100 else ''}",
+            )
+
+        except Exception as e:
+            api_time = time.time() - start_time
+            self.logger.error(f"LLM API调用失败，耗时: {api_time:.2f}秒，错误: {e}", exc_info=True)
+            msg = f"翻译失败: {e}"
+            raise Exception(msg) from e
+        else:
+            return translated_text
+
+    def translate_stream(self, text: str) -> "Iterator[str]":
+        """流式翻译文本，逐块产出增量结果.
+
+        使用stream=True的流式响应，首个token到达即产出，
+        调用方可以边接收边做后续处理（如按句启动TTS）。
+
+        Args:
+            text: 要翻译的文本
+
+        Yields
+        ------
+            翻译结果的增量文本块
+
+        Raises
+        ------
+            Exception: 翻译过程中的任何错误
+        """
+        start_time = time.time()
+        self.logger.info("开始流式调用LLM API翻译文本: %.50s%s", text, "..." if len(text) > 50 else "")
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.config.model,
+                messages=[
+                    self._get_system_message(),
+                    {
+                        "role": "user",
+                        "content": text,
+                    },
+                ],
+                stream=True,
+                timeout=self.config.timeout,
+            )
+
+            first_token_time: float | None = None
+            for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                        self.logger.info("首个token到达，耗时: %.2f秒", first_token_time)
+                    yield delta
+
+            api_time = time.time() - start_time
+            self.logger.info("LLM API流式调用成功，耗时: %.2f秒", api_time)
+
+        except Exception as e:
+            api_time = time.time() - start_time
+            self.logger.error(f"LLM API流式调用失败，耗时: {api_time:.2f}秒，错误: {e}", exc_info=True)
+            msg = f"翻译失败: {e}"
+            raise Exception(msg) from e
+
+    def _get_async_client(self) -> "AsyncOpenAI":
+        """获取异步客户端（延迟创建，进程内复用）.
+
+        Returns
+        -------
+            异步OpenAI客户端
+        """
+        if self._async_client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(
+                api_key=self.config.api_key,
+                base_url=self.config.base_url,
+                max_retries=self.config.max_retries,
+                http_client=httpx.AsyncClient(**self._http_client_kwargs()),
+            )
+        return self._async_client
+
+    async def translate_stream_async(self, text: str) -> "AsyncIterator[str]":
+        """异步流式翻译文本，逐块产出增量结果.
+
+        Args:
+            text: 要翻译的文本
+
+        Yields
+        ------
+            翻译结果的增量文本块
+
+        Raises
+        ------
+            Exception: 翻译过程中的任何错误
+        """
+        start_time = time.time()
+        self.logger.info("开始异步调用LLM API翻译文本: %.50s%s", text, "..." if len(text) > 50 else "")
+
+        try:
+            client = self._get_async_client()
+            response = await client.chat.completions.create(
+                model=self.config.model,
+                messages=[
+                    self._get_system_message(),
+                    {
+                        "role": "user",
+                        "content": text,
+                    },
+                ],
+                stream=True,
+                timeout=self.config.timeout,
+            )
+
+            async for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+            api_time = time.time() - start_time
+            self.logger.info("LLM API异步调用成功，耗时: %.2f秒", api_time)
+
+        except Exception as e:
+            api_time = time.time() - start_time
+            self.logger.error(f"LLM API异步调用失败，耗时: {api_time:.2f}秒，错误: {e}", exc_info=True)
+            msg = f"翻译失败: {e}"
+            raise Exception(msg) from e
+
+    async def translate_async(self, text: str) -> str:
+        """异步翻译文本.
+
+        使用流式响应逐块接收翻译结果，首个token到达即开始累积，
+        便于调用方与TTS等后台任务并行执行。相同文本的并发调用
+        （如快捷键被快速触发两次）合并为一次API请求，共享同一结果。
+
+        Args:
+            text: 要翻译的文本
+
+        Returns
+        -------
+            翻译结果
+        """
+        key = f"{self.config.target_language}\x00{text}"
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._collect_stream(text))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.logger.info("合并重复的在途翻译请求")
+        return await task
+
+    async def _collect_stream(self, text: str) -> str:
+        """消费异步流并拼接为完整译文.
+
+        Args:
+            text: 要翻译的文本
+
+        Returns
+        -------
+            翻译结果
+        """
+        parts = [delta async for delta in self.translate_stream_async(text)]
+        return "".join(parts).strip()
+
+    def test_connection(self) -> bool:
+        """测试LLM API连接.
+
+        Returns
+        -------
+            连接是否成功
+        """
+        try:
+            self.logger.info("测试LLM API连接")
+
+            # 发送一个简单的测试请求
+            response = self.client.chat.completions.create(
+                model=self.config.model,
+                messages=[
+                    {"role": "user", "content": "Hello"},
+                ],
+                max_tokens=10,
+                timeout=10,  # 10秒超时
+            )
+
+            self.logger.info("LLM API连接测试成功")
+
+        except Exception as e:
+            self.logger.error(f"LLM API连接测试失败: {e}", exc_info=True)
+            return False
+        else:
+            return True
@@ -1,84 +1,82 @@
-"""音频播放模块.
-
-package.yml 定义了 <Ctrl-Q> 快捷键，用于播放音频。
-优化为支持详细的日志记录和错误处理，立即返回结果给espanso。
-"""
-
-import io
-import sys
-import time
-from pathlib import Path
-
-from playsound import playsound
-from src.config import ConfigManager
-from src.utils import setup_logging
-
-
-def main() -> None:
-    """主函数.
-
-    播放最后生成的音频文件。立即返回结果给espanso，然后异步播放音频。
-    """
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
-    start_time = time.time()
-
-    # 设置日志记录
-    log_file = Path(__file__).parent.parent.parent / "logs" / "audio.log"
-    logger = setup_logging(log_file=str(log_file))
-
-    logger.info("=" * 50)
-    logger.info("开始音频播放请求")
-
-    try:
-        config = ConfigManager()
-        # 检查是否有可播放的音频文件
-        if config.audio_file_path is None:
-            error_msg = "没有可播放的音频文件"
-            logger.warning(error_msg)
-            # 立即返回错误信息给espanso
-            sys.stdout.write("❌ 没有可播放的音频文件")
-            sys.stdout.flush()
-            return
-
-        logger.info(f"播放音频文件: {config.audio_file_path}")
-
-        # 立即返回空内容给espanso，然后异步播放音频
-        sys.stdout.write("")
-        sys.stdout.flush()
-
-        # 在后台异步播放音频
-        import threading
-
-        audio_thread = threading.Thread(
-            target=playsound(config.audio_file_path, block=True),
-            daemon=True,
-        )
-        audio_thread.start()
-
-        total_time = time.time() - start_time
-        logger.info(f"音频播放请求完成，总耗时: {total_time:.2f}秒")
-
-    except FileNotFoundError as e:
-        error_msg = f"配置文件错误: {e}"
-        logger.error(error_msg, exc_info=True)
-        sys.stdout.write(f"❌ 配置文件错误: {e}")
-        sys.stdout.flush()
-    except ValueError as e:
-        error_msg = f"配置错误: {e}"
-        logger.error(error_msg, exc_info=True)
-        sys.stdout.write(f"❌ 配置错误: {e}")
-        sys.stdout.flush()
-    except Exception as e:
-        total_time = time.time() - start_time
-        error_msg = f"音频播放失败: {e}"
-        logger.error(f"{error_msg}，总耗时: {total_time:.2f}秒", exc_info=True)
-        sys.stdout.write(f"❌ 音频播放失败: {e}")
-        sys.stdout.flush()
-
-    finally:
-        logger.info("音频播放请求结束")
-        logger.info("=" * 50)
-
-
-if __name__ == "__main__":
-    main()
+"""音频播放模块.
+
+package.yml 定义了 <Ctrl-Q> 快捷键，用于播放音频。
+优化为支持详细的日志记录和错误处理，立即返回结果给espanso。
+"""
+
+import os
+import time
+from pathlib import Path
+
+from src.config import ConfigManager
+from src.utils import setup_logging
+
+
+def main() -> None:
+    """主函数.
+
+    播放最后生成的音频文件。先关闭stdout让espanso立即拿到空结果，
+    再在本进程内同步播放音频。
+    """
+    start_time = time.time()
+
+    # 第一阶段只做释放stdout所需的最小工作：espanso等的是stdout的EOF，
+    # 日志初始化（建目录、开文件）和音频相关导入都推迟到espanso解除阻塞之后
+    stdout_closed = False
+    config = None
+    error_msg = None
+
+    try:
+        config = ConfigManager()
+        if Path(config.audio_file_path).exists():
+            # 关闭stdout让espanso的管道读端立刻收到EOF，
+            # 不必等待播放结束；espanso等的是stdout而不是进程退出
+            os.close(1)
+            stdout_closed = True
+        else:
+            error_msg = "没有可播放的音频文件"
+    except FileNotFoundError as e:
+        error_msg = f"配置文件错误: {e}"
+    except ValueError as e:
+        error_msg = f"配置错误: {e}"
+    except Exception as e:
+        error_msg = f"音频播放失败: {e}"
+
+    if error_msg is not None and not stdout_closed:
+        # 出错时把错误信息作为替换结果返回给espanso
+        os.write(1, f"❌ {error_msg}".encode())
+
+    # 第二阶段：stdout已释放（或错误已返回），此后的开销espanso感知不到
+    log_file = Path(__file__).parent.parent.parent / "logs" / "audio.log"
+    logger = setup_logging(log_file=str(log_file))
+
+    logger.info("=" * 50)
+    logger.info("开始音频播放请求")
+
+    try:
+        if error_msg is not None:
+            logger.warning(error_msg)
+            return
+
+        logger.info(f"播放音频文件: {config.audio_file_path}")
+
+        # 复用AudioService的播放逻辑，不再各自实现
+        from src.services import AudioService
+
+        audio_service = AudioService(config)
+        audio_service.play_blocking(config.audio_file_path)
+
+        total_time = time.time() - start_time
+        logger.info(f"音频播放请求完成，总耗时: {total_time:.2f}秒")
+
+    except Exception as e:
+        total_time = time.time() - start_time
+        logger.error(f"音频播放失败: {e}，总耗时: {total_time:.2f}秒", exc_info=True)
+
+    finally:
+        logger.info("音频播放请求结束")
+        logger.info("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""后台任务工作进程：常驻进程处理音频和diff生成。
+
+每次翻译为音频/diff各拉起一个新解释器，重复支付openai/edge_tts
+等依赖的导入成本。本工作进程常驻后，触发端只需通过本地连接
+投递任务元组，不再重复导入。空闲超过配置时间后自动退出。
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from multiprocessing.connection import Listener
+from pathlib import Path
+
+from src.core import ServiceFactory
+from src.utils import get_worker_authkey, setup_logging
+
+
+def _start_audio_loop() -> asyncio.AbstractEventLoop:
+    """在后台线程中启动常驻事件循环供音频任务复用.
+
+    每条音频任务都asyncio.run()会反复创建和销毁事件循环；
+    常驻循环只创建一次，并发的音频协程也能共享同一个循环。
+
+    Returns
+    -------
+        已在后台线程运行的事件循环
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+# 并发处理的任务上限：触发风暴时阻塞接收而不是无限堆积线程和TTS连接
+_TASK_SEMAPHORE = threading.BoundedSemaphore(4)
+
+
+def _handle_message(message: tuple, translation_manager, logger, audio_loop) -> None:
+    """处理一条后台任务消息.
+
+    Args:
+        message: 任务元组，("audio", 译文) 或 ("diff", 原文, 译文)
+        translation_manager: 翻译管理器
+        logger: 日志记录器
+        audio_loop: 常驻音频事件循环
+    """
+    try:
+        kind = message[0]
+        if kind == "audio":
+            asyncio.run_coroutine_threadsafe(
+                translation_manager.audio_service.stream_tts_audio(message[1]),
+                audio_loop,
+            ).result()
+        elif kind == "diff":
+            translation_manager.diff_service.generate_and_write_diff(message[1], message[2])
+        else:
+            logger.warning(f"未知的后台任务类型: {kind}")
+    except Exception as e:
+        logger.error(f"后台任务处理失败: {e}", exc_info=True)
+    finally:
+        _TASK_SEMAPHORE.release()
+
+
+def main() -> None:
+    """工作进程主循环."""
+    log_file = Path(__file__).parent.parent.parent / "logs" / "background_worker.log"
+    # 常驻进程不做日志缓冲：实时可见，且os._exit退出不经过atexit刷新
+    logger = setup_logging(log_file=str(log_file), buffered=False)
+
+    factory = ServiceFactory()
+    config = factory.get_config()
+    translation_manager = factory.get_translation_manager()
+
+    try:
+        listener = Listener(("127.0.0.1", config.worker_port), authkey=get_worker_authkey())
+    except OSError:
+        # 端口被占用：已有工作进程在运行，直接退出
+        logger.info("后台工作进程已在运行，退出")
+        return
+
+    logger.info(f"后台工作进程启动，监听127.0.0.1:{config.worker_port}")
+    state = {"last_activity": time.time()}
+
+    def _idle_watchdog() -> None:
+        timeout = config.daemon_idle_timeout
+        while True:
+            time.sleep(min(timeout, 30))
+            if time.time() - state["last_activity"] > timeout:
+                logger.info(f"空闲超过{timeout}秒，后台工作进程退出")
+                import logging
+                import os
+
+                # os._exit跳过atexit，手动刷掉所有处理器再退出
+                logging.shutdown()
+                os._exit(0)
+
+    threading.Thread(target=_idle_watchdog, daemon=True).start()
+    audio_loop = _start_audio_loop()
+
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:
+            logger.error(f"接受连接失败: {e}", exc_info=True)
+            continue
+        state["last_activity"] = time.time()
+        try:
+            with conn:
+                message = conn.recv()
+        except (EOFError, OSError) as e:
+            logger.warning(f"读取任务消息失败: {e}")
+            continue
+        # 每条任务单独线程处理，音频和diff可并行执行；
+        # 信号量限制在途任务数，满载时在此阻塞形成背压
+        _TASK_SEMAPHORE.acquire()
+        threading.Thread(
+            target=_handle_message,
+            args=(message, translation_manager, logger, audio_loop),
+            daemon=True,
+        ).start()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ 后台工作进程失败: {e}", file=sys.stderr)
+        sys.exit(2)
@@ -3,9 +3,6 @@
 import sys
 from pathlib import Path
 
-from src.core import ServiceFactory
-from src.utils import setup_logging
-
 
 def main() -> None:
     """音频生成子进程入口."""
@@ -13,20 +10,23 @@ def main() -> None:
         print("缺少参数：需要生成音频的文本", file=sys.stderr)
         sys.exit(1)
     text = sys.argv[1]
+
+    # 重量级导入放在参数校验之后，参数错误时不付包导入开销
+    from src.core import ServiceFactory
+    from src.utils import setup_logging
+
     log_file = Path(__file__).parent.parent.parent / "logs" / "audio_generate.log"
     logger = setup_logging(log_file=str(log_file))
     logger.info("= 音频生成子进程启动 =")
     try:
         factory = ServiceFactory()
         translation_manager = factory.get_translation_manager()
-        # 直接同步生成音频
+        # 流式生成并播放（首块到达即出声），同时写入文件供重播。
+        # asyncio.run会正确关闭异步生成器并清理loop，
+        # 不必手动new_event_loop/set_event_loop/close
         import asyncio
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(translation_manager.audio_service.generate_tts_audio(text))
-        loop.close()
-        translation_manager.audio_service.play_last_audio()
+        asyncio.run(translation_manager.audio_service.stream_tts_audio(text))
         logger.info("音频生成完成")
     except Exception as e:
         logger.error(f"音频生成失败: {e}", exc_info=True)
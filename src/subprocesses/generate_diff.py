@@ -3,10 +3,6 @@
 import sys
 from pathlib import Path
 
-from src.config import ConfigManager
-from src.services import DiffService
-from src.utils import setup_logging
-
 
 def main() -> None:
     """diff生成子进程入口."""
@@ -15,6 +11,12 @@ def main() -> None:
         sys.exit(1)
     original = sys.argv[1]
     translated = sys.argv[2]
+
+    # 重量级导入放在参数校验之后，参数错误时不付包导入开销
+    from src.config import ConfigManager
+    from src.services import DiffService
+    from src.utils import setup_logging
+
     log_file = Path(__file__).parent.parent.parent / "logs" / "diff_generate.log"
     logger = setup_logging(log_file=str(log_file))
     logger.info("= diff生成子进程启动 =")
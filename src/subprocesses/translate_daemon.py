@@ -0,0 +1,129 @@
+"""翻译守护进程：常驻进程复用已加载的SDK和HTTP连接池。
+
+每次espanso触发都冷启动Python解释器并导入openai/edge_tts等重量级依赖，
+对短文本来说导入耗时可能超过LLM调用本身。本守护进程在首次请求后常驻，
+保持OpenAI客户端、配置和keep-alive连接池处于热状态，
+后续请求通过本地socket直达，免去解释器启动和导入开销。
+空闲超过配置时间后自动退出。
+"""
+
+import asyncio
+import hmac
+import os
+import sys
+import time
+from pathlib import Path
+
+from src.core import ServiceFactory
+from src.utils import get_worker_authkey, setup_logging
+
+# 认证随机数长度与HMAC-SHA256摘要长度
+_NONCE_LEN = 16
+_DIGEST_LEN = 32
+
+
+async def _handle_client(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """处理一个翻译请求：先做authkey质询认证，再读文本返回译文.
+
+    与后台工作进程的Listener(authkey=...)等价：守护进程会消耗
+    用户的API密钥，不能为任意本地进程服务。连接建立后先发送
+    随机质询，客户端须回以HMAC-SHA256(认证密钥, 质询)，
+    验证失败直接断开，不发起任何LLM调用。
+    """
+    daemon = _DaemonState.instance
+    daemon.last_activity = time.time()
+    try:
+        nonce = os.urandom(_NONCE_LEN)
+        writer.write(nonce)
+        await writer.drain()
+        try:
+            digest = await asyncio.wait_for(reader.readexactly(_DIGEST_LEN), timeout=5)
+        except (TimeoutError, asyncio.IncompleteReadError):
+            daemon.logger.warning("连接未完成认证质询，已断开")
+            return
+        expected = hmac.new(get_worker_authkey(), nonce, "sha256").digest()
+        if not hmac.compare_digest(digest, expected):
+            daemon.logger.warning("连接认证失败，已断开")
+            return
+
+        data = await reader.read()
+        text = data.decode("utf-8")
+        daemon.logger.info(f"收到翻译请求，文本长度: {len(text)}字符")
+        translated = await daemon.translation_manager.translate_text_async(text)
+        writer.write(translated.encode("utf-8"))
+        await writer.drain()
+    except Exception as e:
+        daemon.logger.error(f"处理请求失败: {e}", exc_info=True)
+        writer.write(f"❌ 翻译失败: {e}".encode())
+    finally:
+        daemon.last_activity = time.time()
+        writer.close()
+
+
+class _DaemonState:
+    """守护进程全局状态（单实例）."""
+
+    instance: "_DaemonState | None" = None
+
+    def __init__(self) -> None:
+        """初始化守护进程状态，预热服务."""
+        factory = ServiceFactory()
+        self.config = factory.get_config()
+        self.translation_manager = factory.get_translation_manager()
+        log_file = Path(__file__).parent.parent.parent / "logs" / "translate_daemon.log"
+        # 常驻进程不做日志缓冲，运行期间日志实时可见
+        self.logger = setup_logging(log_file=str(log_file), buffered=False)
+        self.last_activity = time.time()
+        _DaemonState.instance = self
+
+
+async def _idle_watchdog(server: asyncio.Server) -> None:
+    """空闲超时后关闭服务器."""
+    daemon = _DaemonState.instance
+    timeout = daemon.config.daemon_idle_timeout
+    while True:
+        await asyncio.sleep(min(timeout, 30))
+        if time.time() - daemon.last_activity > timeout:
+            daemon.logger.info(f"空闲超过{timeout}秒，守护进程退出")
+            server.close()
+            return
+
+
+async def main_async() -> None:
+    """守护进程主循环."""
+    daemon = _DaemonState()
+    try:
+        server = await asyncio.start_server(
+            _handle_client,
+            host="127.0.0.1",
+            port=daemon.config.daemon_port,
+        )
+    except OSError:
+        # 端口被占用：已有守护进程在运行，直接退出
+        daemon.logger.info("守护进程已在运行，退出")
+        return
+
+    daemon.logger.info(f"翻译守护进程启动，监听127.0.0.1:{daemon.config.daemon_port}")
+    watchdog = asyncio.ensure_future(_idle_watchdog(server))
+    async with server:
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+    watchdog.cancel()
+
+
+def main() -> None:
+    """守护进程入口."""
+    try:
+        asyncio.run(main_async())
+    except Exception as e:
+        print(f"❌ 守护进程启动失败: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,123 @@
 包含各种实用工具函数。
 """
 
+import atexit
 import logging
+import logging.handlers
+import os
+import secrets
+import subprocess
 from pathlib import Path
 
+# 进程间认证密钥长度（字节）
+_AUTHKEY_LEN = 32
+
+# 进程内密钥缓存，避免重复读文件
+_WORKER_AUTHKEY: bytes | None = None
+
+
+def get_worker_authkey() -> bytes:
+    """获取本机进程间连接认证密钥（首次使用时随机生成）.
+
+    密钥不能是仓库里的硬编码常量——那样任何本地进程都能通过认证，
+    向工作进程投递pickle任意代码执行。首次调用时随机生成32字节，
+    以0600权限存放在用户私有缓存目录（0700），守护进程、工作进程
+    和触发端读取同一文件。并发首启用O_EXCL保证只有一个进程写入。
+
+    Returns
+    -------
+        32字节认证密钥
+    """
+    global _WORKER_AUTHKEY  # noqa: PLW0603
+    if _WORKER_AUTHKEY is not None:
+        return _WORKER_AUTHKEY
+
+    base = os.environ.get("XDG_CACHE_HOME")
+    root = Path(base) if base else Path.home() / ".cache"
+    key_path = root / "espanso-llm-quick-translate" / "worker.key"
+    try:
+        key = key_path.read_bytes()
+    except OSError:
+        key = b""
+    if len(key) != _AUTHKEY_LEN:
+        key = secrets.token_bytes(_AUTHKEY_LEN)
+        key_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                os.write(fd, key)
+            finally:
+                os.close(fd)
+        except FileExistsError:
+            # 另一进程刚写入，改用它的密钥保证全机一致
+            key = key_path.read_bytes()
+    _WORKER_AUTHKEY = key
+    return key
+
+# 已配置的日志记录器备忘：常驻进程内重复调用setup_logging时
+# 不再清空处理器、重开日志文件。键包含完整配置，
+# 同一文件换级别/缓冲方式会重新配置而不是返回旧对象
+_CONFIGURED_LOGGERS: dict[tuple, logging.Logger] = {}
+
+
+def spawn_detached(args: list[str]) -> None:
+    """启动完全分离的后台子进程.
+
+    标准输入输出全部重定向到空设备并关闭继承的文件描述符，
+    父进程可以立即退出而不被子进程拖住。Windows下附加
+    CREATE_NO_WINDOW|DETACHED_PROCESS避免弹出控制台窗口，
+    POSIX下通过新会话组脱离父进程。
+
+    Args:
+        args: 子进程命令行参数列表
+    """
+    if os.name != "nt":
+        # POSIX下优先走posix_spawn：跳过fork对父进程页表的复制，
+        # 在父进程刚导入完重量级依赖时能省去明显的启动延迟和RSS尖峰
+        try:
+            devnull = os.open(os.devnull, os.O_RDWR)
+            try:
+                os.posix_spawn(
+                    args[0],
+                    args,
+                    dict(os.environ),
+                    file_actions=[
+                        (os.POSIX_SPAWN_DUP2, devnull, 0),
+                        (os.POSIX_SPAWN_DUP2, devnull, 1),
+                        (os.POSIX_SPAWN_DUP2, devnull, 2),
+                    ],
+                    setsid=True,
+                )
+            finally:
+                os.close(devnull)
+        except (OSError, NotImplementedError, AttributeError):
+            # setsid属性或posix_spawn不可用时回退到常规Popen
+            subprocess.Popen(
+                args,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=True,
+                start_new_session=True,
+            )
+        return
+
+    subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        creationflags=subprocess.CREATE_NO_WINDOW | subprocess.DETACHED_PROCESS,
+    )
+
 
 def setup_logging(
     level: int = logging.INFO,
     log_file: str | None = None,
     log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    *,
+    buffered: bool = True,
 ) -> logging.Logger:
     """设置日志记录.
 
@@ -18,13 +127,26 @@ def setup_logging(
         level: 日志级别
         log_file: 日志文件路径，如果为None则只输出到控制台
         log_format: 日志格式
+        buffered: 是否内存缓冲批量落盘。短命子进程用缓冲省系统调用；
+            常驻进程应传False，保证日志实时可见，且经os._exit退出时
+            （atexit不执行）不丢失缓冲中的记录
 
     Returns
     -------
         配置好的日志记录器
     """
-    # 创建日志记录器
-    logger = logging.getLogger("espanso-llm-quick-translate")
+    # 同一配置只生效一次，后续调用直接返回现成的记录器
+    cache_key = (log_file, level, log_format, buffered)
+    cached = _CONFIGURED_LOGGERS.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # 每个日志文件用独立命名的记录器：后配置的文件不会通过
+    # 共享对象上的handlers.clear()把先配置的文件静默重定向
+    logger_name = "espanso-llm-quick-translate"
+    if log_file is not None:
+        logger_name = f"{logger_name}[{log_file}]"
+    logger = logging.getLogger(logger_name)
     logger.setLevel(level)
 
     # 清除现有的处理器
@@ -44,8 +166,21 @@ def setup_logging(
         file_handler = logging.FileHandler(log_file, encoding="utf-8")
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
 
+        if buffered:
+            # 内存缓冲批量落盘：普通记录攒满或进程退出时才写文件，
+            # 避免每条日志一次write系统调用；ERROR及以上立即刷出
+            memory_handler = logging.handlers.MemoryHandler(
+                capacity=200,
+                flushLevel=logging.ERROR,
+                target=file_handler,
+            )
+            logger.addHandler(memory_handler)
+            atexit.register(memory_handler.flush)
+        else:
+            logger.addHandler(file_handler)
+
+    _CONFIGURED_LOGGERS[cache_key] = logger
     return logger
 
 
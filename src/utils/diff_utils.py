@@ -4,8 +4,15 @@
 """
 
 import difflib
+import re
 from enum import Enum
 
+try:
+    # C++实现的Myers差分算法，比纯Python的SequenceMatcher快一个数量级
+    from rapidfuzz.distance import Levenshtein as _Levenshtein
+except ImportError:
+    _Levenshtein = None
+
 
 class DiffColor(Enum):
     """Diff颜色枚举."""
@@ -18,6 +25,48 @@ class DiffColor(Enum):
     YELLOW_TRANSPARENT = ("<yellow_t>", "</yellow_t>")  # 透明黄色
 
 
+# 颜色标签到透明版本的映射表及单遍替换的匹配模式
+_TRANSPARENT_MAP = {
+    DiffColor.GREEN.value[0]: DiffColor.GREEN_TRANSPARENT.value[0],
+    DiffColor.GREEN.value[1]: DiffColor.GREEN_TRANSPARENT.value[1],
+    DiffColor.RED.value[0]: DiffColor.RED_TRANSPARENT.value[0],
+    DiffColor.RED.value[1]: DiffColor.RED_TRANSPARENT.value[1],
+    DiffColor.YELLOW.value[0]: DiffColor.YELLOW_TRANSPARENT.value[0],
+    DiffColor.YELLOW.value[1]: DiffColor.YELLOW_TRANSPARENT.value[1],
+}
+_TRANSPARENT_RE = re.compile(r"</?(?:green|red|yellow)>")
+
+# 超过该长度的差分退化为整块替换，限制O(N²)匹配的最坏耗时
+_MAX_DIFF_CHARS = 20000
+
+# 共享的空格缓冲，占位段从这里切片，按需翻倍扩容
+_SPACES = " " * 4096
+
+
+def _spaces(n: int) -> str:
+    """返回长度为n的空格串.
+
+    Args:
+        n: 需要的空格数量
+
+    Returns
+    -------
+        长度为n的空格字符串
+    """
+    global _SPACES  # noqa: PLW0603
+    if n > len(_SPACES):
+        _SPACES = " " * max(n, len(_SPACES) * 2)
+    return _SPACES[:n]
+
+# opcode操作到颜色标签对的映射表：相同→绿色，增删→红色，替换→黄色
+_TAG_BY_OPERATION = {
+    "equal": DiffColor.GREEN.value,
+    "delete": DiffColor.RED.value,
+    "insert": DiffColor.RED.value,
+    "replace": DiffColor.YELLOW.value,
+}
+
+
 class DiffUtils:
     """Diff工具类.
 
@@ -38,20 +87,8 @@ class DiffUtils:
         if not text:
             return ""
 
-        # 使用映射表进行转换
-        color_mapping = {
-            DiffColor.GREEN.value[0]: DiffColor.GREEN_TRANSPARENT.value[0],
-            DiffColor.GREEN.value[1]: DiffColor.GREEN_TRANSPARENT.value[1],
-            DiffColor.RED.value[0]: DiffColor.RED_TRANSPARENT.value[0],
-            DiffColor.RED.value[1]: DiffColor.RED_TRANSPARENT.value[1],
-            DiffColor.YELLOW.value[0]: DiffColor.YELLOW_TRANSPARENT.value[0],
-            DiffColor.YELLOW.value[1]: DiffColor.YELLOW_TRANSPARENT.value[1],
-        }
-
-        for old_color, new_color in color_mapping.items():
-            text = text.replace(old_color, new_color)
-
-        return text
+        # 单遍正则替换，避免六次str.replace各自完整扫描并分配新字符串
+        return _TRANSPARENT_RE.sub(lambda m: _TRANSPARENT_MAP[m.group(0)], text)
 
     @staticmethod
     def generate_diff(original: str, translated: str) -> tuple[str, str]:
@@ -67,48 +104,66 @@ class DiffUtils:
         -------
             对齐后的原始文本和翻译文本
         """
-        # 使用 difflib 进行文本比较
-        matcher = difflib.SequenceMatcher(None, original, translated)
-        original_aligned, translated_aligned = [], []
-
-        for operation, i1, i2, j1, j2 in matcher.get_opcodes():
-            original_segment = original[i1:i2]
-            translated_segment = translated[j1:j2]
-
-            if operation == "equal":
-                # 相同部分：绿色
-                original_aligned.append(
-                    f"{DiffColor.GREEN.value[0]}{original_segment}{DiffColor.GREEN.value[1]}",
-                )
-                translated_aligned.append(
-                    f"{DiffColor.GREEN.value[0]}{translated_segment}{DiffColor.GREEN.value[1]}",
-                )
-            elif operation == "delete":
-                # 删除部分：红色
-                original_aligned.append(
-                    f"{DiffColor.RED.value[0]}{original_segment}{DiffColor.RED.value[1]}",
-                )
-                translated_aligned.append(
-                    f"{DiffColor.RED.value[0]}{' ' * len(original_segment)}{DiffColor.RED.value[1]}",
-                )
-            elif operation == "insert":
-                # 插入部分：红色
-                original_aligned.append(
-                    f"{DiffColor.RED.value[0]}{' ' * len(translated_segment)}{DiffColor.RED.value[1]}",
-                )
-                translated_aligned.append(
-                    f"{DiffColor.RED.value[0]}{translated_segment}{DiffColor.RED.value[1]}",
-                )
-            elif operation == "replace":
-                # 替换部分：黄色
-                original_aligned.append(
-                    f"{DiffColor.YELLOW.value[0]}{original_segment}{DiffColor.YELLOW.value[1]}",
-                )
-                translated_aligned.append(
-                    f"{DiffColor.YELLOW.value[0]}{translated_segment}{DiffColor.YELLOW.value[1]}",
-                )
-
-        return "".join(original_aligned), "".join(translated_aligned)
+        green_open, green_close = DiffColor.GREEN.value
+
+        # 两侧完全相同（重复触发同一文本很常见）时跳过差分计算
+        if original == translated:
+            tagged = green_open + original + green_close
+            return tagged, tagged
+
+        # 剥离公共前后缀：相同部分直接标绿，差分核心只处理中间片段，
+        # 把O(N²)匹配的N缩小到真正有差异的区间
+        limit = min(len(original), len(translated))
+        prefix_len = 0
+        while prefix_len < limit and original[prefix_len] == translated[prefix_len]:
+            prefix_len += 1
+        suffix_len = 0
+        while (
+            suffix_len < limit - prefix_len
+            and original[len(original) - 1 - suffix_len] == translated[len(translated) - 1 - suffix_len]
+        ):
+            suffix_len += 1
+        mid_original = original[prefix_len : len(original) - suffix_len]
+        mid_translated = translated[prefix_len : len(translated) - suffix_len]
+
+        prefix = green_open + original[:prefix_len] + green_close if prefix_len else ""
+        suffix = green_open + original[len(original) - suffix_len :] + green_close if suffix_len else ""
+
+        # 超长文本不做逐字符匹配，整块标黄替换并用空格补齐对齐，
+        # 避免极端输入让diff子进程卡住
+        if max(len(mid_original), len(mid_translated)) > _MAX_DIFF_CHARS:
+            yellow_open, yellow_close = DiffColor.YELLOW.value
+            width = max(len(mid_original), len(mid_translated))
+            return (
+                prefix + yellow_open + mid_original.ljust(width) + yellow_close + suffix,
+                prefix + yellow_open + mid_translated.ljust(width) + yellow_close + suffix,
+            )
+
+        # 优先使用rapidfuzz的C实现，未安装时回退到difflib；
+        # autojunk启发式针对代码/日志类输入，对自然语言只会扭曲对齐
+        if _Levenshtein is not None:
+            opcodes = list(_Levenshtein.opcodes(mid_original, mid_translated))
+        else:
+            matcher = difflib.SequenceMatcher(None, mid_original, mid_translated, autojunk=False)
+            opcodes = matcher.get_opcodes()
+
+        # opcode数量已知，预分配列表后按下标赋值，避免append的增量扩容
+        original_aligned = [""] * len(opcodes)
+        translated_aligned = [""] * len(opcodes)
+
+        for idx, (operation, i1, i2, j1, j2) in enumerate(opcodes):
+            open_tag, close_tag = _TAG_BY_OPERATION[operation]
+            # 删除/插入时用等宽空格占位，保持两侧文本对齐
+            original_segment = _spaces(j2 - j1) if operation == "insert" else mid_original[i1:i2]
+            translated_segment = _spaces(i2 - i1) if operation == "delete" else mid_translated[j1:j2]
+
+            original_aligned[idx] = open_tag + original_segment + close_tag
+            translated_aligned[idx] = open_tag + translated_segment + close_tag
+
+        return (
+            prefix + "".join(original_aligned) + suffix,
+            prefix + "".join(translated_aligned) + suffix,
+        )
 
     @staticmethod
     def format_diff_for_display(original: str, translated: str) -> str:
@@ -0,0 +1,42 @@
+"""音频服务单元测试.
+
+覆盖流式TTS依赖的句子切分逻辑：CJK标点后无空格、
+西文标点后必须跟空白、小数点不误切。
+"""
+
+from src.services.audio_service import AudioService
+
+
+def test_split_cjk_without_trailing_space() -> None:
+    """CJK句末标点后没有空格也能切出完整句子."""
+    complete, remainder = AudioService.split_complete_sentences("第一句。第二句！还没说完")
+    assert complete == ["第一句。", "第二句！"]
+    assert remainder == "还没说完"
+
+
+def test_split_western_requires_whitespace() -> None:
+    """西文标点后必须跟空白才算句子边界."""
+    complete, remainder = AudioService.split_complete_sentences("First one. Second one! partial")
+    assert complete == ["First one.", "Second one!"]
+    assert remainder == "partial"
+
+
+def test_decimal_point_not_split() -> None:
+    """小数点后紧跟数字不是句子边界."""
+    complete, remainder = AudioService.split_complete_sentences("圆周率约为3.14159")
+    assert complete == []
+    assert remainder == "圆周率约为3.14159"
+
+
+def test_no_boundary_returns_buffer_as_remainder() -> None:
+    """没有任何边界时整个缓冲作为剩余部分返回."""
+    complete, remainder = AudioService.split_complete_sentences("still streaming")
+    assert complete == []
+    assert remainder == "still streaming"
+
+
+def test_empty_buffer() -> None:
+    """空缓冲返回空列表和空剩余."""
+    complete, remainder = AudioService.split_complete_sentences("")
+    assert complete == []
+    assert remainder == ""
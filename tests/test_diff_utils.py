@@ -0,0 +1,119 @@
+"""Diff工具单元测试.
+
+覆盖generate_diff的各条路径：相同文本快路径、公共前后缀剥离、
+插入/删除占位对齐、CJK文本、超长退化和rapidfuzz/difflib分支一致性。
+"""
+
+import re
+import time
+
+import pytest
+
+from src.utils import diff_utils
+from src.utils.diff_utils import DiffUtils
+
+# 与实现中的颜色标签一致的剥离模式
+_TAG_RE = re.compile(r"</?(?:green|red|yellow)(?:_t)?>")
+
+
+def _strip_tags(tagged: str) -> str:
+    """去掉颜色标签，保留可见文本（含占位空格）."""
+    return _TAG_RE.sub("", tagged)
+
+
+def _assert_reconstructs(original: str, translated: str) -> None:
+    """断言diff输出去标签、去占位空格后能还原两侧输入."""
+    original_diff, translated_diff = DiffUtils.generate_diff(original, translated)
+    # 占位段只由空格构成，去掉所有空格后应与输入一一对应
+    assert _strip_tags(original_diff).replace(" ", "") == original.replace(" ", "")
+    assert _strip_tags(translated_diff).replace(" ", "") == translated.replace(" ", "")
+
+
+def test_identical_text_fast_path() -> None:
+    """完全相同的文本两侧整体标绿."""
+    tagged_original, tagged_translated = DiffUtils.generate_diff("hello", "hello")
+    assert tagged_original == "<green>hello</green>"
+    assert tagged_translated == "<green>hello</green>"
+
+
+def test_empty_inputs() -> None:
+    """空输入不报错且输出可还原."""
+    tagged_original, tagged_translated = DiffUtils.generate_diff("", "")
+    assert _strip_tags(tagged_original) == ""
+    assert _strip_tags(tagged_translated) == ""
+    _assert_reconstructs("", "abc")
+    _assert_reconstructs("abc", "")
+
+
+def test_substring_insertion_alignment() -> None:
+    """译文多出的片段在原文侧以等宽空格占位."""
+    original_diff, translated_diff = DiffUtils.generate_diff("hello world", "hello new world")
+    assert _strip_tags(original_diff) == "hello     world"
+    assert _strip_tags(translated_diff) == "hello new world"
+
+
+def test_deletion_alignment() -> None:
+    """原文多出的片段在译文侧以等宽空格占位."""
+    original_diff, translated_diff = DiffUtils.generate_diff("hello new world", "hello world")
+    assert _strip_tags(original_diff) == "hello new world"
+    assert _strip_tags(translated_diff) == "hello     world"
+
+
+def test_cjk_text() -> None:
+    """CJK文本的差分可还原且相同前缀标绿."""
+    original = "今天天气很好。"
+    translated = "今天天气不错。"
+    _assert_reconstructs(original, translated)
+    original_diff, _ = DiffUtils.generate_diff(original, translated)
+    assert original_diff.startswith("<green>今天天气")
+
+
+def test_common_prefix_suffix_stripped() -> None:
+    """公共前后缀整体标绿，差异只出现在中间."""
+    original_diff, translated_diff = DiffUtils.generate_diff("abcXdef", "abcYdef")
+    assert original_diff == "<green>abc</green><yellow>X</yellow><green>def</green>"
+    assert translated_diff == "<green>abc</green><yellow>Y</yellow><green>def</green>"
+
+
+def test_oversize_input_degrades_quickly() -> None:
+    """超长差异退化为整块标黄替换，且不做O(N²)匹配."""
+    original = "a" * (diff_utils._MAX_DIFF_CHARS + 1)
+    translated = "b" * (diff_utils._MAX_DIFF_CHARS + 100)
+    start = time.time()
+    original_diff, translated_diff = DiffUtils.generate_diff(original, translated)
+    assert time.time() - start < 1.0
+    assert "<yellow>" in original_diff
+    # 整块替换用ljust补齐，两侧可见宽度一致
+    assert len(_strip_tags(original_diff)) == len(_strip_tags(translated_diff))
+
+
+def test_difflib_fallback_reconstructs(monkeypatch: pytest.MonkeyPatch) -> None:
+    """rapidfuzz不可用时difflib分支同样可还原输入."""
+    monkeypatch.setattr(diff_utils, "_Levenshtein", None)
+    _assert_reconstructs("The quick brown fox", "A quick red fox jumps")
+
+
+def test_rapidfuzz_branch_reconstructs() -> None:
+    """rapidfuzz分支可还原输入，且与difflib分支去标签后宽度对齐."""
+    rapidfuzz = pytest.importorskip("rapidfuzz")
+    levenshtein = rapidfuzz.distance.Levenshtein
+    original = "The quick brown fox jumps over the lazy dog"
+    translated = "那只敏捷的棕色狐狸跳过了懒狗"
+    saved = diff_utils._Levenshtein
+    try:
+        diff_utils._Levenshtein = levenshtein
+        _assert_reconstructs(original, translated)
+        original_diff, translated_diff = DiffUtils.generate_diff(original, translated)
+        # Levenshtein的replace段两侧等长，可见宽度必然一致
+        assert len(_strip_tags(original_diff)) == len(_strip_tags(translated_diff))
+    finally:
+        diff_utils._Levenshtein = saved
+
+
+def test_convert_to_transparent() -> None:
+    """颜色标签整体替换为透明版本."""
+    tagged = "<green>a</green><red>b</red><yellow>c</yellow>"
+    assert DiffUtils.convert_to_transparent(tagged) == (
+        "<green_t>a</green_t><red_t>b</red_t><yellow_t>c</yellow_t>"
+    )
+    assert DiffUtils.convert_to_transparent("") == ""